@@ -0,0 +1,195 @@
+"""
+Batch position analyzer for the Connect 6 AI.
+
+Reads positions from a text file, one per line, as the move list that led to them:
+"x,y" cells (x the column, y the row, both from 0) separated by spaces, in the order
+they were played. Player 1's single opening stone comes first, then each side's pairs,
+so the side to move follows from the number of stones. Blank lines and lines starting
+with # are skipped.
+
+Each position is searched with select_ai_move in a pool of worker processes. Each worker
+keeps one transposition table per side to move for all of its positions. Consecutive
+lines are handed to the same worker in chunks, so positions from one game can reuse
+each other's results. A result is written to the JSONL output as soon as it and every
+line before it are done:
+
+    {"line": 12, "stones": 9, "player": 2, "pair": "10,9 8,9", "score": 1234.0,
+     "depth": 3, "nodes": 51234, "seconds": 1.92, "source": "search"}
+
+source tells whether the pair came from the search or was a win, a forced block, a book
+move or a threat-space result. With --stats each record also has the move's
+SearchStats. A line that is not a valid position gets an "error" field instead.
+--resume keeps the records already in the output, including a cut-off last one, and
+continues with the line after the last complete record.
+
+    python Connect6_analyze.py positions.txt analysis.jsonl --nodes 200000 --depth 4
+    python Connect6_analyze.py positions.txt analysis.jsonl --time 5 --resume
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Connect6_engine import (AI_CONFIGS, AI_HEURISTIC_REDUCTION, BOARD_SIZE, DEFAULT_AI_DEPTH, PLAYER_1, PLAYER_2,
+                             WIN_SEQUENCE, Board, SearchStats, TranspositionTable, select_ai_move)
+
+# Transposition tables of this worker process, by side to move (see init_worker)
+_TABLES = {}
+
+
+def read_positions(path, after=0):
+    """Yield (line number, text) for each position line of path after line number after."""
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            text = line.strip()
+            if number > after and text and not text.startswith("#"):
+                yield number, text
+
+
+def build_board(text, size, win_length):
+    """Return (board, player to move) for a move list, or raise ValueError."""
+    board = Board(size, win_length)
+    cells = text.replace(";", " ").split()
+    player = PLAYER_1
+    for i, cell in enumerate(cells):
+        try:
+            x, y = (int(value) for value in cell.split(","))
+        except ValueError:
+            raise ValueError(f"bad cell {cell!r}")
+        if not board.make_move(y, x, player):
+            raise ValueError(f"{cell} is off the board or taken")
+        if i % 2 == 0:  # stones 1, 3, 5, ... end a turn
+            player = PLAYER_2 if player == PLAYER_1 else PLAYER_1
+            if board.has_six(PLAYER_1) or board.has_six(PLAYER_2):
+                raise ValueError("the game is already won")
+    if len(cells) % 2 == 0 and cells:
+        raise ValueError("the last turn has only one of its two stones")
+    return board, player
+
+
+def init_worker():
+    """Give this worker process its transposition tables, kept for every position it analyses."""
+    _TABLES[PLAYER_1] = TranspositionTable()
+    _TABLES[PLAYER_2] = TranspositionTable()
+
+
+def analyze_position(job):
+    """
+    Analyse one position described by the dict job and return its result record.
+
+    job holds the line number and text of the position, the board size and win length,
+    and the ai_type, depth, time_budget, node_budget, seed and stats flag of the search.
+    """
+    record = {"line": job["line"]}
+    try:
+        board, player = build_board(job["text"], job["size"], job["win_length"])
+    except ValueError as e:
+        record["error"] = str(e)
+        return record
+    record["stones"] = len(board.move_stack)
+    record["player"] = player
+    if len(board.get_empty_intersections()) < 2:
+        record["error"] = "no room for two stones"
+        return record
+    random.seed(job["seed"] + job["line"])
+    stats = SearchStats() if job["stats"] else None
+    move_pair, time_taken = select_ai_move(board, job["ai_type"], job["depth"], _TABLES[player], job["time_budget"],
+                                           player=player, node_budget=job["node_budget"], stats=stats)
+    score = time_taken.score
+    record.update({
+        "pair": " ".join(f"{col},{row}" for row, col in move_pair) if move_pair is not None else None,
+        "score": score if score is None or math.isfinite(score) else None,
+        "depth": time_taken.depth,
+        "nodes": time_taken.nodes,
+        "seconds": round(float(time_taken), 4),
+        "source": time_taken.source,
+    })
+    if stats is not None:
+        record["stats"] = stats.to_dict()
+    return record
+
+
+def resume_point(path):
+    """
+    Return the line number of the last complete record in the JSONL file at path, or 0,
+    and cut off anything after that record.
+    """
+    if not os.path.exists(path):
+        return 0
+    last = 0
+    keep = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if not raw.endswith(b"\n"):
+                break
+            last = record["line"]
+            keep += len(raw)
+    with open(path, "r+b") as f:
+        f.truncate(keep)
+    return last
+
+
+def run_analysis(jobs, output, workers, chunksize=4):
+    """Analyse jobs across workers processes, appending each record to output in input order."""
+    count = 0
+    start = time.perf_counter()
+    with open(output, "a") as out:
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+            records = pool.map(analyze_position, jobs, chunksize=chunksize)
+        else:
+            pool = None
+            init_worker()
+            records = map(analyze_position, jobs)
+        try:
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                count += 1
+                if count % 100 == 0:
+                    print(f"{count} positions, up to line {record['line']} ({time.perf_counter() - start:.1f}s)")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse a file of Connect 6 positions with the AI.")
+    parser.add_argument("positions", help="text file with one move list per line")
+    parser.add_argument("output", help="JSONL file to write one result per position to")
+    parser.add_argument("--ai-type", default=AI_HEURISTIC_REDUCTION, choices=list(AI_CONFIGS))
+    parser.add_argument("--depth", type=int, default=DEFAULT_AI_DEPTH, help="maximum search depth")
+    parser.add_argument("--time", type=float, default=None, help="time budget per position, in seconds")
+    parser.add_argument("--nodes", type=int, default=None, help="node budget per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="analysis worker processes")
+    parser.add_argument("--chunk", type=int, default=4, help="consecutive positions handed to a worker at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="board size")
+    parser.add_argument("--win-length", type=int, default=WIN_SEQUENCE, help="stones in a row that win")
+    parser.add_argument("--stats", action="store_true", help="add each search's stats to its record")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep the records already in the output and continue after the last one")
+    args = parser.parse_args()
+
+    after = resume_point(args.output) if args.resume else 0
+    if not args.resume:
+        open(args.output, "w").close()
+    jobs = ({"line": number, "text": text, "size": args.size, "win_length": args.win_length,
+             "ai_type": args.ai_type, "depth": args.depth, "time_budget": args.time, "node_budget": args.nodes,
+             "seed": args.seed, "stats": args.stats} for number, text in read_positions(args.positions, after))
+    if after:
+        print(f"Resuming after line {after}")
+    count, seconds = run_analysis(jobs, args.output, args.workers, args.chunk)
+    print(f"Analysed {count} positions in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
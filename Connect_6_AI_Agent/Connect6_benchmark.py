@@ -0,0 +1,305 @@
+"""
+Search benchmark for the Connect 6 AI.
+
+Plays a few seeded opening stones near the center, then runs alphabeta on the same
+position with board copying and with in-place make/unmake, checks that both searches
+agree and prints nodes searched and nodes per second for each.
+
+With --scaling it instead runs the parallel root search with 1, 2, 4, 8 and 16 worker
+processes, checks each against the serial search and prints the speedup over one worker.
+
+With --symmetry it searches a single center stone, which has all 8 symmetries, and the
+seeded position with Heuristic Reduction and with Symmetry Reduction, checks that both
+find the same score and that Symmetry Reduction searches no more nodes, and prints both.
+
+With --check-patterns it plays random stones on boards of several sizes and win lengths
+and checks that every heuristic's pattern-table tracker agrees with the window-count
+tracker after each move and take-back, and that the heuristic's score read from the
+pattern tables matches a full rescan of the board, then times make/unmake with each.
+
+    python Connect6_benchmark.py --depth 3 --stones 8
+    python Connect6_benchmark.py --depth 3 --stones 8 --scaling
+    python Connect6_benchmark.py --depth 2 --stones 8 --size 25
+    python Connect6_benchmark.py --depth 2 --stones 8 --symmetry
+    python Connect6_benchmark.py --check-patterns
+"""
+import argparse
+import math
+import random
+import time
+
+from Connect6_engine import (AI_CONFIGS, AI_HEURISTIC_REDUCTION, AI_SYMMETRY_REDUCTION, BOARD_SIZE, EMPTY, EVALUATE_OPPONENT_WEIGHTS,
+                             EVALUATE_PLAYER_WEIGHTS, INCREMENTAL_WEIGHTS, OPEN_THREE_OPPONENT_WEIGHTS,
+                             OPEN_THREE_PLAYER_WEIGHTS, PATTERN_MAX_WIN_LENGTH, PLAYER_1, PLAYER_2, SCAN_DIRECTIONS,
+                             THREAT_OPPONENT_WEIGHTS, THREAT_PLAYER_WEIGHTS, WIN_SEQUENCE, Board, PatternTracker,
+                             SearchContext, WindowTracker, alphabeta, evaluate, get_pattern_tables, get_window_scores,
+                             heuristic_open_three, parallel_root_search, threat_focused_heuristic)
+
+# The heuristics as they scored a board before the incremental trackers: weights by
+# stones in a WIN_SEQUENCE window, and the line score's multiplier by stones and open ends
+REFERENCE_HEURISTICS = {
+    evaluate: (EVALUATE_PLAYER_WEIGHTS, EVALUATE_OPPONENT_WEIGHTS, lambda stones, open_ends: (1, 1.5, 2)[open_ends]),
+    threat_focused_heuristic: (THREAT_PLAYER_WEIGHTS, THREAT_OPPONENT_WEIGHTS,
+                               lambda stones, open_ends: (1, 2, 4)[open_ends]),
+    heuristic_open_three: (OPEN_THREE_PLAYER_WEIGHTS, OPEN_THREE_OPPONENT_WEIGHTS,
+                           lambda stones, open_ends: ((1, 3, 5) if stones == 3 else (1, 1.5, 2))[open_ends]),
+}
+
+
+def build_position(stones, seed, size=BOARD_SIZE, spread=3, win_length=WIN_SEQUENCE):
+    """Return a board with `stones` seeded stones placed near the center, alternating players."""
+    rng = random.Random(seed)
+    board = Board(size, win_length)
+    center = size // 2
+    player = PLAYER_1
+    placed = 0
+    while placed < stones:
+        row = center + rng.randint(-spread, spread)
+        col = center + rng.randint(-spread, spread)
+        if board.make_move(row, col, player):
+            placed += 1
+            player = PLAYER_2 if player == PLAYER_1 else PLAYER_1
+    return board
+
+
+def run_search(board, ai_type, depth, in_place, seed, incremental=True):
+    """Search board once and return (score, move_pair, nodes, seconds)."""
+    config = AI_CONFIGS[ai_type]
+    context = SearchContext(in_place=in_place, quiescence_nodes=config.get("quiescence", 0))
+    search_board = board.copy()
+    if incremental:
+        search_board.attach_evaluator(config["heuristic"])
+    random.seed(seed)
+    start = time.perf_counter()
+    search_func = config.get("search", alphabeta)
+    score, move_pair = search_func(search_board, config["depth"](depth), -math.inf, math.inf, True,
+                                  config["heuristic"], config["moves_func"], PLAYER_2, context)
+    return score, move_pair, context.nodes, time.perf_counter() - start
+
+
+def run_scaling(board, ai_type, depth, seed, worker_counts):
+    """Run the parallel root search with each worker count and print its speedup over the first count."""
+    config = AI_CONFIGS[ai_type]
+    serial = run_search(board, ai_type, depth, True, seed)[:2]
+    print(f"   serial: score={serial[0]} pair={serial[1]}")
+    baseline = None
+    mismatch = False
+    for workers in worker_counts:
+        search_board = board.copy()
+        search_board.attach_evaluator(config["heuristic"])
+        random.seed(seed)
+        start = time.perf_counter()
+        score, move_pair, nodes, _ = parallel_root_search(search_board, ai_type, config["depth"](depth), PLAYER_2,
+                                                         workers)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{workers:3d} workers: {nodes:8d} nodes in {seconds:8.3f}s = {nodes / seconds:10.1f} nodes/sec"
+              f"  speedup {baseline / seconds:5.2f}x  score={score} pair={move_pair}")
+        if (score, move_pair) != serial:
+            mismatch = True
+    if mismatch:
+        print("MISMATCH: parallel and serial searches disagree")
+        raise SystemExit(1)
+
+
+def compare_symmetry(positions, depth, seed):
+    """
+    Search each (label, board) of positions with Heuristic Reduction and Symmetry
+    Reduction and print both. Returns the number of positions where Symmetry Reduction
+    finds another score or searches more nodes.
+    """
+    failures = 0
+    for label, board in positions:
+        results = {}
+        for ai_type in (AI_HEURISTIC_REDUCTION, AI_SYMMETRY_REDUCTION):
+            score, move_pair, nodes, seconds = run_search(board, ai_type, depth, True, seed)
+            results[ai_type] = (score, nodes)
+            print(f"{label:>8}, {ai_type:>19}: {nodes:8d} nodes in {seconds:8.3f}s  score={score} pair={move_pair}")
+        (plain_score, plain_nodes), (symmetry_score, symmetry_nodes) = results.values()
+        if symmetry_score != plain_score or symmetry_nodes > plain_nodes:
+            failures += 1
+    return failures
+
+
+def in_bounds(board, row, col):
+    """Return whether (row, col) is on board."""
+    return 0 <= row < board.size and 0 <= col < board.size
+
+
+def reference_has_five(board, player):
+    """Full-scan has_winning_move: a window with win_length - 1 stones of player and an empty end."""
+    length = board.win_length
+    for r in range(board.size):
+        for c in range(board.size):
+            for dr, dc in SCAN_DIRECTIONS:
+                if not in_bounds(board, r + (length - 1) * dr, c + (length - 1) * dc):
+                    continue
+                cells = [board.board[r + i * dr][c + i * dc] for i in range(length)]
+                if cells.count(player) == length - 1 and EMPTY in (cells[0], cells[-1]):
+                    return True
+    return False
+
+
+def reference_score(board, heuristic_func, player):
+    """
+    Score board for player with a full rescan, the way heuristic_func scored it before
+    the incremental trackers.
+
+    Every stone visits each window through it, so a window holding k stones of one
+    player and none of the other's adds its line score k times. For a win length other
+    than WIN_SEQUENCE, k stones are weighted as a WIN_SEQUENCE window with as many stones
+    missing. A full window wins or loses outright, the player's own first.
+    """
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+    player_weights, opponent_weights, multiplier = REFERENCE_HEURISTICS[heuristic_func]
+    if heuristic_func is threat_focused_heuristic:
+        if reference_has_five(board, player):
+            return 10000000
+        if reference_has_five(board, opponent):
+            return -10000000
+    if heuristic_func is heuristic_open_three and reference_has_five(board, opponent):
+        return -9000000
+    length = board.win_length
+    score = 0
+    sixes = set()
+    for r in range(board.size):
+        for c in range(board.size):
+            current_player = board.board[r][c]
+            if current_player == EMPTY:
+                continue
+            for dr, dc in SCAN_DIRECTIONS:
+                for offset in range(length):
+                    start_r, start_c = r - offset * dr, c - offset * dc
+                    end_r, end_c = start_r + (length - 1) * dr, start_c + (length - 1) * dc
+                    if not (in_bounds(board, start_r, start_c) and in_bounds(board, end_r, end_c)):
+                        continue
+                    cells = [board.board[start_r + i * dr][start_c + i * dc] for i in range(length)]
+                    stones = cells.count(current_player)
+                    if stones + cells.count(EMPTY) != length:
+                        continue
+                    if stones == length:
+                        sixes.add(current_player)
+                        continue
+                    weight_key = stones + WIN_SEQUENCE - length
+                    if weight_key < 1:
+                        continue
+                    open_ends = sum(in_bounds(board, row, col) and board.board[row][col] == EMPTY
+                                    for row, col in ((start_r - dr, start_c - dc), (end_r + dr, end_c + dc)))
+                    if current_player == player:
+                        line_score = player_weights[weight_key]
+                    else:
+                        line_score = -opponent_weights[weight_key]
+                    score += line_score * multiplier(weight_key, open_ends)
+    if sixes:
+        return 10000000 if player in sixes else -10000000
+    return score
+
+
+def check_patterns(seed, games=4, reference_every=8):
+    """
+    Compare the pattern-table and window-count trackers of every heuristic on random
+    play, and every reference_every-th position the heuristic's score for both players
+    with reference_score. Times make/unmake with each tracker. Returns the number of
+    mismatches.
+    """
+    mismatches = 0
+    geometries = [(BOARD_SIZE, WIN_SEQUENCE), (15, 5), (9, 4), (13, 7), (BOARD_SIZE, PATTERN_MAX_WIN_LENGTH)]
+    for size, win_length in geometries:
+        for heuristic_func in INCREMENTAL_WEIGHTS:
+            checks = 0
+            references = 0
+            seconds = {"pattern": 0.0, "window": 0.0}
+            for game in range(games):
+                rng = random.Random(seed + game)
+                moves = [(rng.randrange(size), rng.randrange(size)) for _ in range(size * size // 2)]
+                board = Board(size, win_length)
+                pattern = PatternTracker(board, get_pattern_tables(heuristic_func, win_length))
+                window = WindowTracker(board, get_window_scores(heuristic_func, win_length))
+                # The heuristic itself reads the pattern tracker
+                board.evaluators = {heuristic_func: pattern, "window": window}
+                player = PLAYER_1
+                for row, col in moves:
+                    if board.make_move(row, col, player):
+                        player = PLAYER_2 if player == PLAYER_1 else PLAYER_1
+                    if rng.random() < 0.2:
+                        board.unmake_move()
+                    checks += 1
+                    if (pattern.scores, pattern.fives[1:], pattern.sixes[1:], pattern.live[1:]) != \
+                            (window.scores, window.fives[1:], window.sixes[1:], window.live[1:]):
+                        mismatches += 1
+                    if checks % reference_every == 0:
+                        references += 1
+                        for evaluated in (PLAYER_1, PLAYER_2):
+                            if heuristic_func(board, evaluated) != reference_score(board, heuristic_func, evaluated):
+                                mismatches += 1
+                # Time the same moves with each tracker alone, from the empty board
+                while board.unmake_move() is not None:
+                    pass
+                for name, tracker in (("pattern", pattern), ("window", window)):
+                    board.evaluators = {name: tracker}
+                    start = time.perf_counter()
+                    placed = sum(board.make_move(row, col, PLAYER_1 + i % 2) for i, (row, col) in enumerate(moves))
+                    for _ in range(placed):
+                        board.unmake_move()
+                    seconds[name] += time.perf_counter() - start
+            print(f"{size}x{size}, {win_length} in a row, {heuristic_func.__name__:>24}: {checks} positions"
+                  f" ({references} rescanned),"
+                  f" make/unmake {seconds['window'] / seconds['pattern']:4.2f}x faster with pattern tables")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare copying and in-place alphabeta search.")
+    parser.add_argument("--ai-type", default=AI_HEURISTIC_REDUCTION, choices=list(AI_CONFIGS))
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--stones", type=int, default=6, help="seeded stones on the board before searching")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="board size")
+    parser.add_argument("--win-length", type=int, default=WIN_SEQUENCE, help="stones in a row that win")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="rescan the board at every evaluation instead of using the incremental evaluator")
+    parser.add_argument("--scaling", action="store_true", help="benchmark the parallel root search instead")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="worker counts for --scaling")
+    parser.add_argument("--symmetry", action="store_true",
+                        help="compare Symmetry Reduction with Heuristic Reduction instead")
+    parser.add_argument("--check-patterns", action="store_true",
+                        help="check the pattern-table evaluator against the window counts and a full rescan instead")
+    args = parser.parse_args()
+    if args.check_patterns:
+        mismatches = check_patterns(args.seed)
+        if mismatches:
+            print(f"MISMATCH: pattern tables disagree with the window counts or the rescan {mismatches} times")
+            raise SystemExit(1)
+        return
+    if args.scaling and "search" in AI_CONFIGS[args.ai_type]:
+        parser.error("--scaling splits alphabeta's root pairs; choose an --ai-type that searches pairs")
+
+    board = build_position(args.stones, args.seed, args.size, win_length=args.win_length)
+    if args.symmetry:
+        center = Board(args.size, args.win_length)
+        center.make_move(args.size // 2, args.size // 2, PLAYER_1)
+        print(f"depth {args.depth} on the {args.size}x{args.size} board")
+        failures = compare_symmetry([("center", center), (f"{args.stones} stones", board)], args.depth, args.seed)
+        if failures:
+            print("MISMATCH: Symmetry Reduction found another score or searched more nodes")
+            raise SystemExit(1)
+        return
+    print(f"{args.ai_type}, depth {args.depth}, {args.stones} stones on the {args.size}x{args.size} board")
+    if args.scaling:
+        run_scaling(board, args.ai_type, args.depth, args.seed, args.workers)
+        return
+    results = {}
+    for label, in_place in (("copying", False), ("in-place", True)):
+        score, move_pair, nodes, seconds = run_search(board, args.ai_type, args.depth, in_place, args.seed,
+                                                     incremental=not args.full_scan)
+        results[label] = (score, move_pair)
+        print(f"{label:>9}: {nodes:8d} nodes in {seconds:8.3f}s = {nodes / seconds:10.1f} nodes/sec"
+              f"  score={score} pair={move_pair}")
+    if results["copying"] != results["in-place"]:
+        print("MISMATCH: copying and in-place searches disagree")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
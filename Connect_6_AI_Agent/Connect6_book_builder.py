@@ -0,0 +1,127 @@
+"""
+Opening book builder for the Connect 6 AI.
+
+Plays seeded self-play openings: a first stone near the center, then a few turns in
+which each side searches for its best pair with alphabeta. Every searched position is
+stored under its symmetry-canonical key, so transposed and mirrored openings share an
+entry, and the book is written for select_ai_move to memory-map at play time. The book
+records --ai-type, and only that config plays from it.
+
+With --explore, a turn sometimes plays a random pair among the candidate cells instead
+of the searched one, so that games branch into different openings.
+
+    python Connect6_book_builder.py --games 200 --turns 4 --depth 2
+"""
+import argparse
+import math
+import random
+import time
+
+from Connect6_engine import (AI_CONFIGS, AI_HEURISTIC_REDUCTION, BOARD_SIZE, D4_INVERSE, OPENING_BOOK_FILE, PLAYER_1,
+                             PLAYER_2, WIN_SEQUENCE, Board, OpeningBook, SearchContext, TranspositionTable, alphabeta,
+                             find_immediate_wins, get_reduced_moves_cells, get_symmetry_tables, write_opening_book)
+
+
+def load_entries(path, size, win_length, ai_type):
+    """Return the {canonical key: canonical pair} entries of an existing book for the given geometry and AI type."""
+    book = OpeningBook(path)
+    if (book.size, book.win_length) != (size, win_length):
+        book.close()
+        raise ValueError(f"{path} is a book for {book.win_length} in a row on {book.size}x{book.size}")
+    if book.ai_type != ai_type:
+        book.close()
+        raise ValueError(f"{path} is a book for {book.ai_type}")
+    entries = {}
+    for index in range(book.count):
+        key, row1, col1, row2, col2 = book.record(index)
+        entries[key] = ((row1, col1), (row2, col2))
+    book.close()
+    return entries
+
+
+def search_pair(board, player, ai_type, depth, tt):
+    """Return the best pair for player to move on board."""
+    config = AI_CONFIGS[ai_type]
+    search_board = board.copy()
+    search_board.attach_evaluator(config["heuristic"])
+    context = SearchContext(in_place=True, tt=tt, quiescence_nodes=config.get("quiescence", 0))
+    search_func = config.get("search", alphabeta)
+    _, move_pair = search_func(search_board, config["depth"](depth), -math.inf, math.inf, True, config["heuristic"],
+                              config["moves_func"], player, context)
+    return move_pair
+
+
+def play_opening(entries, rng, size, ai_type, depth, turns, spread, explore, tables, win_length=WIN_SEQUENCE):
+    """
+    Play one self-play opening, adding every searched position to entries. tables holds
+    one transposition table per player, as scores are stored from the searcher's point
+    of view. Returns the number added.
+    """
+    symmetry = get_symmetry_tables(size)
+    board = Board(size, win_length)
+    center = size // 2
+    board.make_move(center + rng.randint(-spread, spread), center + rng.randint(-spread, spread), PLAYER_1)
+    player = PLAYER_2
+    added = 0
+    for _ in range(turns):
+        if find_immediate_wins(board, player):
+            break  # tactics, not opening theory
+        key, t = symmetry.canonical_hash(board, player)
+        if key in entries:
+            inverse = D4_INVERSE[t]
+            move_pair = tuple(symmetry.transform_cell(inverse, move) for move in entries[key])
+        else:
+            move_pair = search_pair(board, player, ai_type, depth, tables[player])
+            if move_pair is None:
+                break
+            entries[key] = tuple(symmetry.transform_cell(t, move) for move in move_pair)
+            added += 1
+        if rng.random() < explore:
+            cells = get_reduced_moves_cells(board)
+            if len(cells) >= 2:
+                move_pair = tuple(rng.sample(cells, 2))
+        for row, col in move_pair:
+            board.make_move(row, col, player)
+        if board.has_six(player):
+            break
+        player = PLAYER_2 if player == PLAYER_1 else PLAYER_1
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Connect 6 opening book by self-play.")
+    parser.add_argument("--output", default=OPENING_BOOK_FILE)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3, help="searched turns per game after the first stone")
+    parser.add_argument("--ai-type", default=AI_HEURISTIC_REDUCTION, choices=list(AI_CONFIGS))
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spread", type=int, default=2, help="maximum distance of the first stone from the center")
+    parser.add_argument("--explore", type=float, default=0.3,
+                        help="probability of playing a random candidate pair instead of the searched one")
+    parser.add_argument("--merge", action="store_true", help="extend the existing book at --output")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="board size")
+    parser.add_argument("--win-length", type=int, default=WIN_SEQUENCE, help="stones in a row that win")
+    args = parser.parse_args()
+
+    entries = {}
+    if args.merge:
+        try:
+            entries = load_entries(args.output, args.size, args.win_length, args.ai_type)
+        except ValueError as e:
+            parser.error(str(e))
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    tables = {PLAYER_1: TranspositionTable(), PLAYER_2: TranspositionTable()}
+    start = time.perf_counter()
+    for game in range(args.games):
+        added = play_opening(entries, rng, args.size, args.ai_type, args.depth, args.turns, args.spread,
+                            args.explore, tables, args.win_length)
+        print(f"game {game + 1:4d}: +{added} positions, {len(entries)} in book"
+              f" ({time.perf_counter() - start:.1f}s)")
+    write_opening_book(args.output, args.size, entries, args.win_length, args.ai_type)
+    print(f"Wrote {len(entries)} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
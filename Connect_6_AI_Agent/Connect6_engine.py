@@ -0,0 +1,2880 @@
+"""
+Connect 6 engine: the board, heuristics, move generators and searches behind the game.
+
+Nothing here imports a GUI toolkit, so the engine can be loaded by headless tools and
+long-running protocol processes (see Connect6_protocol.py) as cheaply as possible. The
+GUI in Connect6_game.py is built on top of it. The engine logs through the root logger
+and leaves configuring it to the program that imports it.
+"""
+import math
+import time
+import random
+import heapq
+import json
+import logging
+import os
+import mmap
+import struct
+import queue
+import multiprocessing
+import atexit
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+
+# --- Constants ---
+
+# Default board dimensions; each Board can have its own
+BOARD_SIZE = 19
+
+# Default number of consecutive stones required to win
+WIN_SEQUENCE = 6
+
+# Player values
+EMPTY = 0
+PLAYER_1 = 1  # Human player
+PLAYER_2 = 2  # AI player
+
+# AI types
+AI_MINIMAX_ONLY = "Minimax Only"
+AI_MINIMAX_ALPHA_BETA = "Minimax + Alpha-Beta"
+AI_HEURISTIC_BLOCK_THREATS = "Heuristic Block Threats "#(Limited Search)
+AI_MINIMAX_WITH_THREATS = "Minimax + Threat Heuristic"
+AI_HEURISTIC_OPEN_THREE = "Heuristic Open Three "#(Limited Search)
+AI_MINIMAX_WITH_OPEN_THREE = "Minimax + Open Three Heuristic"
+AI_HEURISTIC_REDUCTION = "Heuristic Reduction"
+AI_SYMMETRY_REDUCTION = "Symmetry Reduction"
+AI_SINGLE_STONE = "Single-Stone Search"
+AI_QUIESCENCE = "Quiescence Search"
+
+# Default AI depth
+DEFAULT_AI_DEPTH = 2
+MAX_AI_DEPTH = 4
+
+# Radius for heuristic reduction
+REDUCTION_RADIUS = 3
+
+# Window weights per heuristic: stones in a WIN_SEQUENCE window -> score for the
+# evaluated player and penalty for their opponent. On other win lengths a window is
+# weighted by how many stones it is short of a win (see build_window_scores).
+EVALUATE_PLAYER_WEIGHTS = {1: 1, 2: 10, 3: 100, 4: 5000, 5: 1000000, 6: 10000000}
+EVALUATE_OPPONENT_WEIGHTS = {1: 1, 2: 20, 3: 500, 4: 20000, 5: 50000000, 6: 10000000}
+THREAT_PLAYER_WEIGHTS = {1: 1, 2: 10, 3: 1000, 4: 10000, 5: 150000, 6: 10000000}
+THREAT_OPPONENT_WEIGHTS = {1: 1, 2: 20, 3: 1500, 4: 30000, 5: 200000, 6: 10000000}
+OPEN_THREE_PLAYER_WEIGHTS = {1: 1, 2: 10, 3: 1000, 4: 5000, 5: 30000000, 6: 10000000}
+OPEN_THREE_OPPONENT_WEIGHTS = {1: 1, 2: 15, 3: 1500, 4: 10000, 5: 50000000, 6: 10000000}
+
+# Longest window scored through pattern tables, which have 3 ** (win_length + 2) entries
+# per heuristic; longer windows are scored from their stone counts (see make_tracker)
+PATTERN_MAX_WIN_LENGTH = 8
+
+# Threat-space search limits: attacker turns deep and total nodes per AI move
+THREAT_SEARCH_DEPTH = 6
+THREAT_SEARCH_NODES = 3000
+
+# Quiescence search at the alphabeta horizon, for configs with a "quiescence" key: nodes
+# allowed per horizon position, turns played out, and replies tried per turn
+QUIESCENCE_NODES = 16
+QUIESCENCE_DEPTH = 4
+QUIESCENCE_WIDTH = 3
+
+# Killer pairs remembered per search depth
+KILLER_SLOTS = 2
+
+# Transposition table: number of two-slot buckets, and the seed for the Zobrist keys
+# (fixed so that hashes are stable across runs and processes)
+TT_BUCKETS = 1 << 16
+ZOBRIST_SEED = 0x5EED
+
+# Background AI: nodes between progress reports
+AI_PROGRESS_NODES = 2000
+
+# Parallel root search: root pairs are handed out in about this many chunks per worker,
+# and the caller's stop() is polled every ROOT_POLL_INTERVAL seconds while they run
+ROOT_CHUNKS_PER_WORKER = 4
+ROOT_POLL_INTERVAL = 0.05
+
+# Opening book, built offline by Connect6_book_builder.py
+OPENING_BOOK_FILE = "connect6_book.bin"
+
+
+# --- Board Class ---
+
+class BitboardLayout:
+    """
+    Precomputed bit positions for a square board.
+
+    Cell (row, col) maps to bit ``row * stride + col``. The stride is one wider than
+    the board, so every row ends with an always-empty guard bit. Shifting a player's
+    mask by 1 (horizontal), stride (vertical), stride + 1 (diagonal) or stride - 1
+    (anti-diagonal) therefore walks a line in that direction without wrapping.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        row_mask = (1 << size) - 1
+        self.full_mask = 0
+        for r in range(size):
+            self.full_mask |= row_mask << (r * self.stride)
+        # Bit index -> (row, col); guard bits map to None
+        self.cell_of = [None] * (size * self.stride)
+        for r in range(size):
+            for c in range(size):
+                self.cell_of[r * self.stride + c] = (r, c)
+        # Bit index -> bit indices of the cells within REDUCTION_RADIUS (Manhattan) of it
+        self.nearby = [None] * (size * self.stride)
+        for r in range(size):
+            for c in range(size):
+                self.nearby[r * self.stride + c] = [
+                    nr * self.stride + nc
+                    for nr in range(max(0, r - REDUCTION_RADIUS), min(size, r + REDUCTION_RADIUS + 1))
+                    for nc in range(max(0, c - REDUCTION_RADIUS), min(size, c + REDUCTION_RADIUS + 1))
+                    if 0 < abs(nr - r) + abs(nc - c) <= REDUCTION_RADIUS
+                ]
+        # Zobrist keys per player and bit index, plus one key per player to move, and one
+        # for a player's second stone of the turn (see alphabeta_single). The seed depends
+        # on the size, and an empty board hashes to the key of its win length, so boards
+        # played under different rules never share transposition-table entries.
+        rng = random.Random(ZOBRIST_SEED + size)
+        self.zobrist = [None] + [[rng.getrandbits(64) for _ in range(size * self.stride)] for _ in range(2)]
+        self.zobrist_turn = [0, rng.getrandbits(64), rng.getrandbits(64)]
+        self.zobrist_second_stone = rng.getrandbits(64)
+        self.zobrist_win_length = [rng.getrandbits(64) for _ in range(size + 1)]
+
+
+_LAYOUTS = {}
+
+
+def get_layout(size):
+    """Return the shared BitboardLayout for a board of the given size."""
+    layout = _LAYOUTS.get(size)
+    if layout is None:
+        layout = _LAYOUTS[size] = BitboardLayout(size)
+    return layout
+
+
+class Board:
+    def __init__(self, size=BOARD_SIZE, win_length=WIN_SEQUENCE):
+        """Initialize a board of given size with empty intersections, won by win_length stones in a row."""
+        self.size = size
+        self.win_length = win_length
+        self.layout = get_layout(size)
+        # One bitmask per player, indexed by player value (slot EMPTY is unused).
+        # The masks are the source of truth for win checks and empty-cell enumeration;
+        # self.board mirrors them as a grid for cheap single-cell reads, and self.flat
+        # as a list indexed by bit index (guard bits stay EMPTY) for the window tables.
+        self.stones = [0, 0, 0]
+        self.board = [[EMPTY for _ in range(size)] for _ in range(size)]
+        self.flat = [EMPTY] * (size * self.layout.stride)
+        # Zobrist hash of the win length and the stones on the board, updated on every make/unmake
+        self.hash = self.layout.zobrist_win_length[min(win_length, size)]
+        # (row, col) of every stone in the order it was placed, for unmake_move
+        self.move_stack = []
+        # Per bit index, the number of stones within REDUCTION_RADIUS; near_mask has a bit
+        # set wherever that count is nonzero, so candidate moves are near_mask & empty
+        self.near_counts = [0] * (size * self.layout.stride)
+        self.near_mask = 0
+        # heuristic function -> PatternTracker or WindowTracker kept in step with every make/unmake
+        self.evaluators = {}
+
+    @classmethod
+    def from_grid(cls, grid, win_length=WIN_SEQUENCE):
+        """Build a board from a list-of-lists grid of player values."""
+        board = cls(len(grid), win_length)
+        for r, row in enumerate(grid):
+            for c, player in enumerate(row):
+                if player != EMPTY:
+                    board.make_move(r, c, player)
+        return board
+
+    def __getstate__(self):
+        """Pickle the board without its shared layout tables."""
+        state = self.__dict__.copy()
+        del state['layout']
+        state['evaluators'] = {}
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled board, rebuilding the bitmasks and indexes for older saves."""
+        self.__dict__.update(state)
+        self.win_length = state.get('win_length', WIN_SEQUENCE)
+        self.layout = get_layout(self.size)
+        if 'flat' not in state:
+            rebuilt = Board.from_grid(self.board, self.win_length)
+            self.stones = rebuilt.stones
+            self.flat = rebuilt.flat
+            self.hash = rebuilt.hash
+            self.move_stack = rebuilt.move_stack
+            self.near_counts = rebuilt.near_counts
+            self.near_mask = rebuilt.near_mask
+            self.evaluators = {}
+
+    def is_valid_move(self, row, col):
+        """Check if a move at (row, col) is valid."""
+        return 0 <= row < self.size and 0 <= col < self.size and self.board[row][col] == EMPTY
+
+    def make_move(self, row, col, player):
+        """Place a player's stone at (row, col) if valid."""
+        if self.is_valid_move(row, col):
+            index = row * self.layout.stride + col
+            self.board[row][col] = player
+            self.flat[index] = player
+            self.stones[player] |= 1 << index
+            self.hash ^= self.layout.zobrist[player][index]
+            self.move_stack.append((row, col))
+            near_counts = self.near_counts
+            for i in self.layout.nearby[index]:
+                if not near_counts[i]:
+                    self.near_mask |= 1 << i
+                near_counts[i] += 1
+            for tracker in self.evaluators.values():
+                tracker.place(row, col, player)
+            return True
+        return False
+
+    def unmake_move(self):
+        """Take back the most recent move. Return its (row, col), or None if no moves were made."""
+        if not self.move_stack:
+            return None
+        row, col = self.move_stack.pop()
+        player = self.board[row][col]
+        index = row * self.layout.stride + col
+        self.board[row][col] = EMPTY
+        self.flat[index] = EMPTY
+        self.stones[player] &= ~(1 << index)
+        self.hash ^= self.layout.zobrist[player][index]
+        near_counts = self.near_counts
+        for i in self.layout.nearby[index]:
+            near_counts[i] -= 1
+            if not near_counts[i]:
+                self.near_mask &= ~(1 << i)
+        for tracker in self.evaluators.values():
+            tracker.remove(row, col, player)
+        return row, col
+
+    def attach_evaluator(self, heuristic_func):
+        """
+        Keep heuristic_func's window scores up to date on every make/unmake, so calls to it
+        on this board (and its copies) read a running total instead of rescanning.
+        Heuristics without an incremental table are left as they are.
+        """
+        if heuristic_func not in self.evaluators:
+            tracker = make_tracker(self, heuristic_func)
+            if tracker is not None:
+                self.evaluators[heuristic_func] = tracker
+
+    def check_win(self, row, col, player):
+        """Check if placing a stone at (row, col) results in a win for player. Return (win, winning_line)."""
+        stones = self.stones[player]
+        index = row * self.layout.stride + col
+        if not (stones >> index) & 1:
+            return False, None
+        for shift in self.layout.shifts:
+            start = index
+            while start >= shift and (stones >> (start - shift)) & 1:
+                start -= shift
+            end = index
+            while (stones >> (end + shift)) & 1:
+                end += shift
+            if (end - start) // shift + 1 >= self.win_length:
+                cell_of = self.layout.cell_of
+                return True, [cell_of[i] for i in range(start, end + 1, shift)]
+        return False, None
+
+    def has_six(self, player):
+        """Check if player has win_length stones in a row anywhere on the board."""
+        stones = self.stones[player]
+        for shift in self.layout.shifts:
+            run = stones
+            for _ in range(self.win_length - 1):
+                run &= run >> shift
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    def is_board_full(self):
+        """Check if the board has no empty intersections."""
+        return self.stones[PLAYER_1] | self.stones[PLAYER_2] == self.layout.full_mask
+
+    def empty_mask(self):
+        """Return the bitmask of empty intersections."""
+        return self.layout.full_mask & ~(self.stones[PLAYER_1] | self.stones[PLAYER_2])
+
+    def get_empty_intersections(self):
+        """Return a list of all empty (row, col) intersections."""
+        cell_of = self.layout.cell_of
+        return [cell_of[i] for i, bit in enumerate(bin(self.empty_mask())[:1:-1]) if bit == '1']
+
+    def get_candidate_moves(self):
+        """Return the empty (row, col) intersections within REDUCTION_RADIUS of a stone, in board order."""
+        cell_of = self.layout.cell_of
+        return [cell_of[i] for i, bit in enumerate(bin(self.near_mask & self.empty_mask())[:1:-1]) if bit == '1']
+
+    def copy(self, with_evaluators=True):
+        """Return an independent copy of the board, optionally without its attached evaluators."""
+        new_board = Board.__new__(Board)
+        new_board.size = self.size
+        new_board.win_length = self.win_length
+        new_board.layout = self.layout
+        new_board.stones = self.stones[:]
+        new_board.hash = self.hash
+        new_board.board = [row[:] for row in self.board]
+        new_board.flat = self.flat[:]
+        new_board.move_stack = self.move_stack[:]
+        new_board.near_counts = self.near_counts[:]
+        new_board.near_mask = self.near_mask
+        new_board.evaluators = {func: tracker.copy(new_board) for func, tracker in self.evaluators.items()} \
+            if with_evaluators else {}
+        return new_board
+
+    def __str__(self):
+        """Return a string representation of the board."""
+        s = ""
+        for r in range(self.size):
+            s += " ".join([str(x) for x in self.board[r]]) + "\n"
+        return s
+
+
+# --- Window Tables ---
+
+SCAN_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class WindowTables:
+    """
+    Every win_length-long window on a board of the given size, precomputed once per geometry.
+
+    A window is a tuple of flat cell indices, the cells' bit indices in the board's
+    BitboardLayout, so scanning code reads Board.flat or the bitmasks directly and never
+    bounds-checks coordinates. windows_at and flanked_at map each cell to the windows
+    covering and flanking it. index holds the same windows as a NumPy array, row k giving
+    every window's k-th cell, for counting the stones in every window at once: a
+    player's stones count 1 and the opponent's win_length + 1, so a window sums to k
+    exactly when it holds k of the player's stones and none of the opponent's.
+
+    A window's pattern is its cells and both flanks read as a base-3 number, digit i
+    being the i-th cell from the first flank: 0 for empty, or the player on it. A flank
+    off the board counts as a stone (see pattern_base). patterns_at maps each cell to
+    the (window, 3 ** digit) pairs that a stone on it adds to, times its player.
+    """
+
+    def __init__(self, size, win_length):
+        stride = get_layout(size).stride
+        self.size = size
+        self.win_length = win_length
+        self.nbytes = (size * stride + 7) // 8
+        self.cells = []  # window -> tuple of flat cell indices in line order
+        self.flanks = []  # window -> the on-board cells just before and after it
+        self.windows_at = [[] for _ in range(size * stride)]  # flat cell -> windows covering it
+        self.flanked_at = [[] for _ in range(size * stride)]  # flat cell -> windows it flanks
+        starts = []
+        for d, (dr, dc) in enumerate(SCAN_DIRECTIONS):
+            for r in range(size):
+                for c in range(size):
+                    end_r, end_c = r + (win_length - 1) * dr, c + (win_length - 1) * dc
+                    if not (0 <= end_r < size and 0 <= end_c < size):
+                        continue
+                    window = len(self.cells)
+                    cells = tuple((r + i * dr) * stride + c + i * dc for i in range(win_length))
+                    flanks = tuple(fr * stride + fc for fr, fc in ((r - dr, c - dc), (end_r + dr, end_c + dc))
+                                   if 0 <= fr < size and 0 <= fc < size)
+                    self.cells.append(cells)
+                    self.flanks.append(flanks)
+                    starts.append((cells[0], d))
+                    for cell in cells:
+                        self.windows_at[cell].append(window)
+                    for cell in flanks:
+                        self.flanked_at[cell].append(window)
+        self.index = np.array(self.cells, dtype=np.intp).reshape(len(self.cells), win_length).T.copy()
+        # Windows in board order of their first cell, then by direction
+        self.board_order = np.array(sorted(range(len(self.cells)), key=starts.__getitem__), dtype=np.intp)
+
+        self.pattern_base = []  # window -> pattern of its off-board flanks alone
+        flank_digits = []  # window -> {flank cell: digit}
+        for (dr, dc), cells in zip((SCAN_DIRECTIONS[d] for _, d in starts), self.cells):
+            first_r, first_c = divmod(cells[0], stride)
+            digits = {}
+            base = 0
+            for digit, (fr, fc) in ((0, (first_r - dr, first_c - dc)),
+                                    (win_length + 1, (first_r + win_length * dr, first_c + win_length * dc))):
+                if 0 <= fr < size and 0 <= fc < size:
+                    digits[fr * stride + fc] = digit
+                else:
+                    base += 3 ** digit
+            self.pattern_base.append(base)
+            flank_digits.append(digits)
+        # Covering windows first, then flanked ones, in the order WindowTracker rescores them
+        self.patterns_at = [[(window, 3 ** (self.cells[window].index(cell) + 1)) for window in self.windows_at[cell]]
+                            + [(window, 3 ** flank_digits[window][cell]) for window in self.flanked_at[cell]]
+                            for cell in range(size * stride)]
+
+    def _bits(self, board, player):
+        return np.unpackbits(np.frombuffer(board.stones[player].to_bytes(self.nbytes, 'little'), dtype=np.uint8),
+                             bitorder='little').view(np.int8)
+
+    def plane(self, board, player):
+        """Return a flat int8 array by bit index with player's stones as 1 and the opponent's as win_length + 1."""
+        opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+        plane = self._bits(board, player)
+        plane += self._bits(board, opponent) * np.int8(self.win_length + 1)
+        return plane
+
+    def sums(self, plane):
+        """Return the plane summed over every window, as an array indexed by window."""
+        return np.take(plane, self.index).sum(axis=0, dtype=np.int16)
+
+
+_WINDOW_TABLES = {}
+
+
+def get_window_tables(size, win_length=WIN_SEQUENCE):
+    """Return the shared WindowTables for a board of the given size and win length."""
+    tables = _WINDOW_TABLES.get((size, win_length))
+    if tables is None:
+        tables = _WINDOW_TABLES[size, win_length] = WindowTables(size, win_length)
+    return tables
+
+
+def scan_windows(board, player, stones):
+    """
+    Return the windows holding exactly `stones` of player's stones and none of the
+    opponent's, as a list of window indices in board order of the window's first cell.
+    """
+    tables = get_window_tables(board.size, board.win_length)
+    mask = tables.sums(tables.plane(board, player)) == stones
+    order = tables.board_order
+    return order[mask[order]].tolist()
+
+
+def five_windows(board, player):
+    """
+    Return the windows where player has win_length - 1 stones and the missing cell is
+    an empty end of the window, as a list of (window, empty_spot) in board order of the
+    window's first cell.
+    """
+    tables = get_window_tables(board.size, board.win_length)
+    flat = board.flat
+    cell_of = board.layout.cell_of
+    windows = []
+    for window in scan_windows(board, player, board.win_length - 1):
+        cells = tables.cells[window]
+        if flat[cells[0]] == EMPTY:
+            windows.append((window, cell_of[cells[0]]))
+        elif flat[cells[-1]] == EMPTY:
+            windows.append((window, cell_of[cells[-1]]))
+    return windows
+
+
+# --- AI Strategies and Functions ---
+
+def has_winning_move(board, player):
+    """Check if the specified player has an immediate winning move."""
+    return bool(five_windows(board, player))
+
+
+def find_critical_threats(board, player):
+    """Find immediate threats where opponent could win in next move"""
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+    # A cell completing several windows is reported once, in the order first found
+    return list(dict.fromkeys(empty_spot for _, empty_spot in five_windows(board, opponent)))
+
+
+def find_immediate_wins(board, player=PLAYER_2):
+    """
+    Return every pair that wins for player this turn: one stone completing a window of
+    win_length - 1 plus a random second stone, or two stones completing a window of
+    win_length - 2.
+    """
+    winning_pairs = []
+    empty_spots = None
+
+    # Single-move wins
+    for _, empty_spot in five_windows(board, player):
+        if empty_spots is None:
+            empty_spots = board.get_empty_intersections()
+        second_spots = [s for s in empty_spots if s != empty_spot]
+        if second_spots:
+            second_move = random.choice(second_spots)
+            winning_pairs.append((empty_spot, second_move))
+            logging.info(f"Single-move win found at {empty_spot}, second move {second_move}")
+
+    # Two-move wins
+    tables = get_window_tables(board.size, board.win_length)
+    flat = board.flat
+    cell_of = board.layout.cell_of
+    for window in scan_windows(board, player, board.win_length - 2):
+        move1, move2 = [cell_of[cell] for cell in tables.cells[window] if flat[cell] == EMPTY]
+        winning_pairs.append((move1, move2))
+        logging.info(f"Two-move win found at {move1}, {move2}")
+
+    return winning_pairs
+
+
+def window_tracker(board, heuristic_func):
+    """
+    Return the tracker attached to board for heuristic_func, or, if there is none, a new
+    one scoring the board's current windows (see make_tracker).
+    """
+    tracker = board.evaluators.get(heuristic_func)
+    if tracker is None:
+        tracker = make_tracker(board, heuristic_func)
+    return tracker
+
+
+def evaluate(board, player):
+    """
+    Evaluate the board state for the given player with improved defensive weights.
+    """
+    tracker = window_tracker(board, evaluate)
+    if tracker.has_six():
+        return 10000000 if tracker.sixes[player] else -10000000  # Immediate win or loss
+    return tracker.scores[player]
+
+
+def threat_focused_heuristic(board, player):
+    """
+    Heuristic that prioritizes blocking opponent threats and creating own threats.
+    """
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+
+    # First check for immediate wins/losses
+    tracker = window_tracker(board, threat_focused_heuristic)
+    if tracker.fives[player]:
+        return 10000000
+    if tracker.fives[opponent]:
+        return -10000000
+    if tracker.has_six():
+        return 10000000 if tracker.sixes[player] else -10000000
+    return tracker.scores[player]
+
+
+def heuristic_open_three(board, player):
+    """
+    Heuristic that evaluates open three sequences with improved defensive awareness.
+    """
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+
+    # Check for immediate threats first
+    tracker = window_tracker(board, heuristic_open_three)
+    if tracker.fives[opponent]:
+        return -9000000  # Very high penalty for allowing opponent threats
+    if tracker.has_six():
+        return 10000000 if tracker.sixes[player] else -10000000
+    return tracker.scores[player]
+
+
+# --- Incremental Evaluation ---
+
+def build_window_scores(player_weights, opponent_weights, open_multiplier, win_length=WIN_SEQUENCE):
+    """
+    Precompute a heuristic's total contribution of one window.
+
+    A window holding k stones of one player counts its weighted line score once per stone,
+    k times in all. Returns (own, opposing) where own[k][open_ends] is the contribution when
+    the k stones belong to the evaluated player and opposing[k][open_ends] when they belong
+    to the opponent. The weights are keyed by stones in a WIN_SEQUENCE window; for another
+    win_length, k stones are weighted as the WIN_SEQUENCE window with as many stones missing,
+    and windows too far from a win are worth nothing.
+    """
+    own = [[0] * 3 for _ in range(win_length + 1)]
+    opposing = [[0] * 3 for _ in range(win_length + 1)]
+    for k in range(1, win_length + 1):
+        weight_key = k + WIN_SEQUENCE - win_length
+        if weight_key < 1:
+            continue
+        for open_ends in range(3):
+            multiplier = open_multiplier(weight_key, open_ends)
+            own[k][open_ends] = k * player_weights[weight_key] * multiplier
+            opposing[k][open_ends] = -k * opponent_weights[weight_key] * multiplier
+    return own, opposing
+
+
+_WINDOW_SCORES = {}
+
+
+def get_window_scores(heuristic_func, win_length=WIN_SEQUENCE):
+    """Return the shared window score tables of heuristic_func for win_length, or None if it has no weights."""
+    key = (heuristic_func, win_length)
+    if key not in _WINDOW_SCORES:
+        weights = INCREMENTAL_WEIGHTS.get(heuristic_func)
+        _WINDOW_SCORES[key] = build_window_scores(*weights, win_length) if weights is not None else None
+    return _WINDOW_SCORES[key]
+
+
+class WindowTracker:
+    """
+    Running window counts and heuristic score for one board.
+
+    Keeps each window's stone counts per player and its current contribution to the score
+    from both players' points of view. Placing or removing a stone only re-scores the
+    windows that cover the cell or use it as a flank, so the score is always current
+    without rescanning the board.
+    """
+
+    def __init__(self, board, table):
+        self.board = board
+        self.own, self.opposing = table
+        self.tables = get_window_tables(board.size, board.win_length)
+        self.win_length = board.win_length
+        self.stride = board.layout.stride
+        count = len(self.tables.cells)
+        self.counts = [None, [0] * count, [0] * count]
+        self.values = [None, [0] * count, [0] * count]  # contribution to scores[player]
+        self.status = [0] * count  # player holding an open-ended five in the window, or EMPTY
+        self.live_status = [0] * count  # player holding win_length - 2 or more uncontested stones, or EMPTY
+        self.scores = [None, 0, 0]
+        self.fives = [0, 0, 0]  # windows per player that has_winning_move would report
+        self.sixes = [0, 0, 0]  # windows per player filled with win_length stones
+        self.live = [0, 0, 0]  # windows per player that they can fill in one turn
+        for row, col in board.move_stack:
+            self.place(row, col, board.board[row][col])
+
+    def copy(self, board):
+        """Return a copy of this tracker following board."""
+        new_tracker = WindowTracker.__new__(WindowTracker)
+        new_tracker.board = board
+        new_tracker.own, new_tracker.opposing = self.own, self.opposing
+        new_tracker.tables = self.tables
+        new_tracker.win_length = self.win_length
+        new_tracker.stride = self.stride
+        new_tracker.counts = [None, self.counts[PLAYER_1][:], self.counts[PLAYER_2][:]]
+        new_tracker.values = [None, self.values[PLAYER_1][:], self.values[PLAYER_2][:]]
+        new_tracker.status = self.status[:]
+        new_tracker.live_status = self.live_status[:]
+        new_tracker.scores = self.scores[:]
+        new_tracker.fives = self.fives[:]
+        new_tracker.sixes = self.sixes[:]
+        new_tracker.live = self.live[:]
+        return new_tracker
+
+    def has_six(self):
+        """Check if either player has a full winning window on the board."""
+        return self.sixes[PLAYER_1] > 0 or self.sixes[PLAYER_2] > 0
+
+    def place(self, row, col, player):
+        """Account for a stone just placed at (row, col)."""
+        cell = row * self.stride + col
+        counts = self.counts[player]
+        for window in self.tables.windows_at[cell]:
+            counts[window] += 1
+            if counts[window] == self.win_length:
+                self.sixes[player] += 1
+            self._rescore(window)
+        for window in self.tables.flanked_at[cell]:
+            self._rescore(window)
+
+    def remove(self, row, col, player):
+        """Account for a stone just removed from (row, col)."""
+        cell = row * self.stride + col
+        counts = self.counts[player]
+        for window in self.tables.windows_at[cell]:
+            if counts[window] == self.win_length:
+                self.sixes[player] -= 1
+            counts[window] -= 1
+            self._rescore(window)
+        for window in self.tables.flanked_at[cell]:
+            self._rescore(window)
+
+    def _rescore(self, window):
+        """Recompute one window's contribution and five status from the current board."""
+        flat = self.board.flat
+        count1 = self.counts[PLAYER_1][window]
+        count2 = self.counts[PLAYER_2][window]
+        value1 = value2 = 0
+        status = live = EMPTY
+        if count1 and not count2 or count2 and not count1:
+            holder, stones = (PLAYER_1, count1) if count1 else (PLAYER_2, count2)
+            open_ends = 0
+            for cell in self.tables.flanks[window]:
+                if flat[cell] == EMPTY:
+                    open_ends += 1
+            if holder == PLAYER_1:
+                value1, value2 = self.own[stones][open_ends], self.opposing[stones][open_ends]
+            else:
+                value1, value2 = self.opposing[stones][open_ends], self.own[stones][open_ends]
+            if stones == self.win_length - 1:
+                cells = self.tables.cells[window]
+                if flat[cells[0]] == EMPTY or flat[cells[-1]] == EMPTY:
+                    status = holder
+            if stones >= self.win_length - 2:
+                live = holder
+
+        values1, values2 = self.values[PLAYER_1], self.values[PLAYER_2]
+        if value1 != values1[window]:
+            self.scores[PLAYER_1] += value1 - values1[window]
+            values1[window] = value1
+        if value2 != values2[window]:
+            self.scores[PLAYER_2] += value2 - values2[window]
+            values2[window] = value2
+        old_status = self.status[window]
+        if status != old_status:
+            if old_status:
+                self.fives[old_status] -= 1
+            if status:
+                self.fives[status] += 1
+            self.status[window] = status
+        old_live = self.live_status[window]
+        if live != old_live:
+            if old_live:
+                self.live[old_live] -= 1
+            if live:
+                self.live[live] += 1
+            self.live_status[window] = live
+
+
+def build_pattern_tables(window_scores, win_length):
+    """
+    Precompute a heuristic's window contributions by pattern (see WindowTables).
+
+    Returns (values, states): values[player][pattern] is the window's contribution to
+    the score of player, as WindowTracker computes it from window_scores, and
+    states[pattern] is five_holder + 3 * six_holder + 9 * live_holder: the player (or
+    EMPTY) that has an open-ended five in the window, the one that fills it and the one
+    that can fill it in one turn.
+    """
+    own, opposing = window_scores
+    patterns = np.arange(3 ** (win_length + 2))
+    digits = [patterns // 3 ** i % 3 for i in range(win_length + 2)]
+    count1 = sum((digit == PLAYER_1).astype(np.intp) for digit in digits[1:-1])
+    count2 = sum((digit == PLAYER_2).astype(np.intp) for digit in digits[1:-1])
+    open_ends = (digits[0] == EMPTY).astype(np.intp) + (digits[-1] == EMPTY)
+    holder = np.where(count2 == 0, PLAYER_1, PLAYER_2) * ((count1 == 0) != (count2 == 0))
+    stones = count1 + count2
+    five = (stones == win_length - 1) & ((digits[1] == EMPTY) | (digits[-2] == EMPTY))
+    states = holder * five + 3 * holder * (stones == win_length) + 9 * holder * (stones >= win_length - 2)
+
+    # Index into each player's flattened [stones][open_ends] scores, with index 0 for
+    # the windows that score nothing: empty, or holding stones of both players
+    index = (stones * 3 + open_ends).tolist()
+    own_scores = [score for row in own for score in row]
+    opposing_scores = [score for row in opposing for score in row]
+    values = [None, [], []]
+    for i, holds in zip(index, holder.tolist()):
+        if holds == PLAYER_1:
+            values[PLAYER_1].append(own_scores[i])
+            values[PLAYER_2].append(opposing_scores[i])
+        elif holds == PLAYER_2:
+            values[PLAYER_1].append(opposing_scores[i])
+            values[PLAYER_2].append(own_scores[i])
+        else:
+            values[PLAYER_1].append(0)
+            values[PLAYER_2].append(0)
+    return values, states.tolist()
+
+
+_PATTERN_TABLES = {}
+
+
+def get_pattern_tables(heuristic_func, win_length=WIN_SEQUENCE):
+    """
+    Return the shared pattern tables of heuristic_func for win_length, or None if it has
+    no weights or the window is longer than PATTERN_MAX_WIN_LENGTH.
+    """
+    key = (heuristic_func, win_length)
+    if key not in _PATTERN_TABLES:
+        window_scores = get_window_scores(heuristic_func, win_length)
+        _PATTERN_TABLES[key] = build_pattern_tables(window_scores, win_length) \
+            if window_scores is not None and win_length <= PATTERN_MAX_WIN_LENGTH else None
+    return _PATTERN_TABLES[key]
+
+
+class PatternTracker:
+    """
+    Running heuristic score for one board, read from pattern tables.
+
+    Keeps each window's pattern and its current contribution to the score from both
+    players' points of view, like WindowTracker, but a stone only adds to the pattern of
+    each window it covers or flanks, and the window's new contribution and five, six and
+    live state are single table lookups.
+    """
+
+    def __init__(self, board, patterns):
+        self.board = board
+        self.lookup, self.state_of = patterns
+        tables = get_window_tables(board.size, board.win_length)
+        self.patterns_at = tables.patterns_at
+        self.stride = board.layout.stride
+        self.patterns = tables.pattern_base[:]
+        self.values = [None, [self.lookup[PLAYER_1][pattern] for pattern in self.patterns],
+                       [self.lookup[PLAYER_2][pattern] for pattern in self.patterns]]
+        # five_holder + 3 * six_holder + 9 * live_holder
+        self.states = [self.state_of[pattern] for pattern in self.patterns]
+        self.scores = [None, sum(self.values[PLAYER_1]), sum(self.values[PLAYER_2])]
+        self.fives = [0, 0, 0]  # windows per player that has_winning_move would report
+        self.sixes = [0, 0, 0]  # windows per player filled with win_length stones
+        self.live = [0, 0, 0]  # windows per player that they can fill in one turn
+        for row, col in board.move_stack:
+            self.place(row, col, board.board[row][col])
+
+    def copy(self, board):
+        """Return a copy of this tracker following board."""
+        new_tracker = PatternTracker.__new__(PatternTracker)
+        new_tracker.board = board
+        new_tracker.lookup, new_tracker.state_of = self.lookup, self.state_of
+        new_tracker.patterns_at = self.patterns_at
+        new_tracker.stride = self.stride
+        new_tracker.patterns = self.patterns[:]
+        new_tracker.values = [None, self.values[PLAYER_1][:], self.values[PLAYER_2][:]]
+        new_tracker.states = self.states[:]
+        new_tracker.scores = self.scores[:]
+        new_tracker.fives = self.fives[:]
+        new_tracker.sixes = self.sixes[:]
+        new_tracker.live = self.live[:]
+        return new_tracker
+
+    def has_six(self):
+        """Check if either player has a full winning window on the board."""
+        return self.sixes[PLAYER_1] > 0 or self.sixes[PLAYER_2] > 0
+
+    def place(self, row, col, player):
+        """Account for a stone just placed at (row, col)."""
+        self._add(row * self.stride + col, player)
+
+    def remove(self, row, col, player):
+        """Account for a stone just removed from (row, col)."""
+        self._add(row * self.stride + col, -player)
+
+    def _add(self, cell, digit):
+        """Add digit to the cell's place in the pattern of every window it covers or flanks, and rescore them."""
+        patterns = self.patterns
+        lookup1, lookup2 = self.lookup[PLAYER_1], self.lookup[PLAYER_2]
+        values1, values2 = self.values[PLAYER_1], self.values[PLAYER_2]
+        states = self.states
+        for window, weight in self.patterns_at[cell]:
+            pattern = patterns[window] + digit * weight
+            patterns[window] = pattern
+            value = lookup1[pattern]
+            if value != values1[window]:
+                self.scores[PLAYER_1] += value - values1[window]
+                values1[window] = value
+            value = lookup2[pattern]
+            if value != values2[window]:
+                self.scores[PLAYER_2] += value - values2[window]
+                values2[window] = value
+            state = self.state_of[pattern]
+            if state != states[window]:
+                # A part of the state held by no one counts at index EMPTY, which is never read
+                old_state = states[window]
+                if old_state:
+                    self.fives[old_state % 3] -= 1
+                    self.sixes[old_state // 3 % 3] -= 1
+                    self.live[old_state // 9] -= 1
+                if state:
+                    self.fives[state % 3] += 1
+                    self.sixes[state // 3 % 3] += 1
+                    self.live[state // 9] += 1
+                states[window] = state
+
+
+def make_tracker(board, heuristic_func):
+    """
+    Return a new tracker of heuristic_func's score on board: a PatternTracker when the
+    heuristic has pattern tables for the board's win length, a WindowTracker when it only
+    has window scores, or None when it has neither.
+    """
+    patterns = get_pattern_tables(heuristic_func, board.win_length)
+    if patterns is not None:
+        return PatternTracker(board, patterns)
+    window_scores = get_window_scores(heuristic_func, board.win_length)
+    return WindowTracker(board, window_scores) if window_scores is not None else None
+
+
+# --- Transposition Table ---
+
+# Bound types for transposition table entries
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """
+    Bounded table of alphabeta results keyed by Zobrist hash.
+
+    Each bucket has two slots: a depth-preferred slot that is only overwritten by an
+    equal or deeper search of any position, and an always-replace slot that takes
+    everything else. Scores are from the searching player's point of view, so use one
+    table per AI player and heuristic.
+    """
+
+    def __init__(self, buckets=TT_BUCKETS):
+        self.buckets = buckets
+        # Entries are (key, depth, bound, score, best_pair); slot 2*i is depth-preferred
+        self.slots = [None] * (2 * buckets)
+        self.occupied = 0  # slots holding an entry, kept by store so filled() needs no scan
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def probe(self, key):
+        """Return the entry stored for key, or None."""
+        self.probes += 1
+        index = 2 * (key % self.buckets)
+        for entry in (self.slots[index], self.slots[index + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        return None
+
+    def store(self, key, depth, bound, score, best_pair):
+        """Store a search result, replacing an older entry if the bucket is full."""
+        self.stores += 1
+        index = 2 * (key % self.buckets)
+        deep = self.slots[index]
+        entry = (key, depth, bound, score, best_pair)
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            slot = index
+        else:
+            slot = index + 1
+        if self.slots[slot] is None:
+            self.occupied += 1
+        elif self.slots[slot][0] != key:
+            self.replacements += 1
+        self.slots[slot] = entry
+
+    def hit_rate(self):
+        """Return the fraction of probes that found an entry."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def filled(self):
+        """Return the number of occupied slots."""
+        return self.occupied
+
+    def stats(self):
+        """Return the table's counters as a dict."""
+        return {'probes': self.probes, 'hits': self.hits, 'hit_rate': round(self.hit_rate(), 4),
+                'stores': self.stores, 'replacements': self.replacements,
+                'filled': self.filled(), 'slots': len(self.slots)}
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self.__init__(self.buckets)
+
+
+class SearchTimeout(Exception):
+    """Raised inside alphabeta once the search deadline has passed."""
+
+
+class SearchTime(float):
+    """
+    Seconds taken by select_ai_move, also carrying the depth reached, the nodes searched,
+    the search score (None if there was no search) and the source of the move: 'win',
+    'block', 'book', 'threat' or 'search'.
+    """
+
+    def __new__(cls, seconds, depth=0, nodes=0, score=None, source='search'):
+        value = super().__new__(cls, seconds)
+        value.depth = depth
+        value.nodes = nodes
+        value.score = score
+        value.source = source
+        return value
+
+
+class SearchStats:
+    """
+    Opt-in counters of where searches spend their time. Pass one to select_ai_move (or
+    as a SearchContext's stats) to fill it; without one the search only pays for a few
+    `is not None` tests.
+
+    calls and seconds count the calls of, and time spent in, each kind of work:
+    'heuristic', 'move_generation', the 'critical_threats' and 'immediate_wins' scans,
+    and 'threat_space' and 'book' before the search. nodes_by_depth counts nodes by
+    remaining depth (0 for the leaves), summed over iterative deepening's iterations.
+    cutoffs counts beta cutoffs by the position in search order of the move that caused
+    them (0 for the first). children counts the moves searched below interior nodes.
+    quiescence_nodes counts the pairs played by quiescence searches, which are not in
+    nodes_by_depth.
+    """
+
+    def __init__(self):
+        self.moves = 0
+        self.calls = {}
+        self.seconds = {}
+        self.nodes_by_depth = {}
+        self.leaf_evaluations = 0
+        self.quiescence_nodes = 0
+        self.interior_nodes = 0
+        self.children = 0
+        self.cutoffs = {}
+        self.tt_probes = 0
+        self.tt_hits = 0
+
+    def time(self, kind, func, *args):
+        """Return func(*args), counting the call and its time under kind."""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.seconds[kind] = self.seconds.get(kind, 0.0) + time.perf_counter() - start
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+
+    def timed(self, kind, func):
+        """Return func wrapped to count its calls and time under kind."""
+        return lambda *args: self.time(kind, func, *args)
+
+    def count_node(self, depth):
+        """Count a node at remaining depth."""
+        self.nodes_by_depth[depth] = self.nodes_by_depth.get(depth, 0) + 1
+
+    def count_children(self, searched, cutoff):
+        """Count an interior node that searched `searched` moves, the last of them cutting off if cutoff."""
+        self.interior_nodes += 1
+        self.children += searched
+        if cutoff:
+            self.cutoffs[searched - 1] = self.cutoffs.get(searched - 1, 0) + 1
+
+    def to_dict(self):
+        """Return the counters, and the ratios derived from them, as a JSON-ready dict."""
+        cutoffs = sum(self.cutoffs.values())
+        return {
+            "moves": self.moves,
+            "nodes": sum(self.nodes_by_depth.values()),
+            "nodes_by_depth": {str(depth): n for depth, n in sorted(self.nodes_by_depth.items(), reverse=True)},
+            "leaf_evaluations": self.leaf_evaluations,
+            "quiescence_nodes": self.quiescence_nodes,
+            "interior_nodes": self.interior_nodes,
+            "children": self.children,
+            "branching_factor": round(self.children / self.interior_nodes, 3) if self.interior_nodes else None,
+            "cutoffs": {str(index): n for index, n in sorted(self.cutoffs.items())},
+            "first_move_cutoff_rate": round(self.cutoffs.get(0, 0) / cutoffs, 4) if cutoffs else None,
+            "calls": dict(self.calls),
+            "seconds": {kind: round(seconds, 6) for kind, seconds in self.seconds.items()},
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+        }
+
+    def merge(self, record):
+        """Add the counters of a to_dict() record, such as one move's stats, to these."""
+        self.moves += record["moves"]
+        for depth, n in record["nodes_by_depth"].items():
+            self.nodes_by_depth[int(depth)] = self.nodes_by_depth.get(int(depth), 0) + n
+        for index, n in record["cutoffs"].items():
+            self.cutoffs[int(index)] = self.cutoffs.get(int(index), 0) + n
+        for kind, n in record["calls"].items():
+            self.calls[kind] = self.calls.get(kind, 0) + n
+        for kind, seconds in record["seconds"].items():
+            self.seconds[kind] = self.seconds.get(kind, 0.0) + seconds
+        self.leaf_evaluations += record["leaf_evaluations"]
+        self.quiescence_nodes += record["quiescence_nodes"]
+        self.interior_nodes += record["interior_nodes"]
+        self.children += record["children"]
+        self.tt_probes += record["tt_probes"]
+        self.tt_hits += record["tt_hits"]
+
+
+class SearchContext:
+    """
+    State shared by every node of one alphabeta search.
+
+    With in_place=True (the default) each candidate pair is played on the searched
+    board and taken back with unmake_move once its subtree is scored. With
+    in_place=False every node works on fresh board copies, as the search originally did.
+    An optional TranspositionTable is probed and filled at every interior node.
+
+    When deadline (a time.perf_counter() value) is set, the search raises SearchTimeout
+    as soon as it passes; so it does once max_nodes nodes are searched, and as soon as
+    stop(), if given, returns True. root_depth
+    marks the root node, whose best pair so far is kept in root_best as (score, pair) so
+    an interrupted search still has a move to offer. progress, if given, is called with
+    the context every AI_PROGRESS_NODES nodes. stats, an optional SearchStats, is filled
+    as the search goes.
+
+    With quiescence_nodes above 0, each horizon position is played on by a quiescence
+    search of at most that many pairs (see quiescence); 0, the default, scores it with
+    the heuristic alone.
+
+    Pairs that cause a beta cutoff are kept as killers of their depth, and credit their
+    cells in the history table (see record_cutoff); move ordering uses both.
+    """
+
+    def __init__(self, in_place=True, tt=None, deadline=None, root_depth=None, stop=None, progress=None,
+                 max_nodes=None, stats=None, quiescence_nodes=0):
+        self.in_place = in_place
+        self.tt = tt
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.root_depth = root_depth
+        self.stop = stop
+        self.progress = progress
+        self.stats = stats
+        self.quiescence_nodes = quiescence_nodes
+        self.quiescence_left = 0  # turns left to the running quiescence search
+        self.root_best = None
+        self.nodes = 0
+        self.next_report = 0
+        self.killers = {}  # depth -> up to KILLER_SLOTS pairs, most recent first
+        self.history = {}  # (player, cell) -> cutoff credit
+        # Whether check_time has anything to do; the search skips calling it otherwise
+        self.watched = deadline is not None or stop is not None or progress is not None or max_nodes is not None
+
+    def check_time(self):
+        """
+        Report progress if due, and raise SearchTimeout if the deadline has passed, the
+        node budget is spent or stop() is true.
+        """
+        if self.progress is not None and self.nodes >= self.next_report:
+            self.next_report = self.nodes + AI_PROGRESS_NODES
+            self.progress(self)
+        if self.stop is not None and self.stop():
+            raise SearchTimeout()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchTimeout()
+
+    def record_cutoff(self, depth, player, pair):
+        """Keep pair, which just caused a beta cutoff for player at depth, as a killer and credit its cells."""
+        killers = self.killers.setdefault(depth, [])
+        if pair not in killers and (pair[1], pair[0]) not in killers:
+            killers.insert(0, pair)
+            del killers[KILLER_SLOTS:]
+        # Deeper cutoffs prune more, so they earn more credit
+        for cell in pair:
+            self.history[player, cell] = self.history.get((player, cell), 0) + depth * depth
+
+
+def ordered_pairs(board, cells, player, heuristic_func, original_player, best_high, context, first=None,
+                  killers=(), orbit_key=None):
+    """
+    Yield every pair of cells for player best-first, without building the pair list.
+
+    Each cell is scored once with a single stone of player on it. Pairs then come off a
+    heap in order of their summed single-stone scores, highest first when best_high and
+    lowest first otherwise, so a cutoff stops the enumeration after the pairs it needed.
+    Equal scores are ordered by the cells' history credit.
+
+    first, if it is a pair of the given cells, is yielded before all the others. The
+    killers that are pairs of the given cells follow the best-scored pair.
+
+    orbit_key, if given, maps a pair to the key of its class under the position's
+    symmetries (see SymmetryTables.orbit_key); a pair whose key was already yielded is
+    skipped, as it leads to an equivalent position.
+    """
+    scores = []
+    for row, col in cells:
+        if context.watched:
+            context.check_time()
+        if context.in_place:
+            board.make_move(row, col, player)
+            score = heuristic_func(board, original_player)
+            board.unmake_move()
+        else:
+            temp_board = board.copy()
+            temp_board.make_move(row, col, player)
+            score = heuristic_func(temp_board, original_player)
+        scores.append(score if best_high else -score)
+    history = context.history
+    credits = [history.get((player, cell), 0) for cell in cells]
+    order = sorted(range(len(cells)), key=lambda i: (scores[i], credits[i]), reverse=True)
+    cells = [cells[i] for i in order]
+    scores = [scores[i] for i in order]
+    credits = [credits[i] for i in order]
+
+    cell_set = set(cells)
+    skip = set()
+
+    seen = set()
+
+    def playable(pair):
+        return pair[0] in cell_set and pair[1] in cell_set and pair[0] != pair[1] and pair not in skip
+
+    def fresh(pair):
+        if orbit_key is None:
+            return True
+        key = orbit_key(pair)
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    if first is not None and playable(first) and fresh(first):
+        yield first
+        skip.update((first, (first[1], first[0])))
+
+    # Pair (i, j), i < j, is reached from (i, j - 1), or from (i - 1, i) when j == i + 1;
+    # both rank at least as high (score, then credit), so pairs leave the heap best-first
+    count = len(cells)
+    heap = [(-(scores[0] + scores[1]), -(credits[0] + credits[1]), 0, 1)] if count > 1 else []
+    while heap:
+        _, _, i, j = heapq.heappop(heap)
+        pair = (cells[i], cells[j])
+        if pair not in skip and fresh(pair):
+            yield pair
+            # Killers go second: ahead of the best-scored pair they cost more cutoffs than they bring
+            for killer in killers:
+                if playable(killer) and fresh(killer):
+                    yield killer
+                    skip.update((killer, (killer[1], killer[0])))
+            killers = ()
+        if j + 1 < count:
+            heapq.heappush(heap, (-(scores[i] + scores[j + 1]), -(credits[i] + credits[j + 1]), i, j + 1))
+            if j == i + 1:
+                heapq.heappush(heap, (-(scores[j] + scores[j + 1]), -(credits[j] + credits[j + 1]), j, j + 1))
+
+
+def score_move_pair(board, move1, move2, player, heuristic_func, original_player, context):
+    """Return heuristic_func's score after player plays move1 and move2."""
+    if context.watched:
+        context.check_time()
+    if not context.in_place:
+        temp_board = board.copy()
+        temp_board.make_move(move1[0], move1[1], player)
+        temp_board.make_move(move2[0], move2[1], player)
+        return heuristic_func(temp_board, original_player)
+    placed = board.make_move(move1[0], move1[1], player) + board.make_move(move2[0], move2[1], player)
+    score = heuristic_func(board, original_player)
+    for _ in range(placed):
+        board.unmake_move()
+    return score
+
+
+def order_move_pairs(board, player, heuristic_func, get_moves_func, original_player, best_high, context, first=None,
+                     killers=()):
+    """
+    Return the pairs get_moves_func offers player in search order, or None if it offers none.
+
+    Generators in PAIR_CELLS are streamed lazily by ordered_pairs, and those in
+    SYMMETRY_PAIRS skip the pairs that a symmetry of the board maps onto one streamed
+    before. Any other generator's list is sorted by the heuristic score of each pair, then
+    the history credit of its cells. Either way the best pairs for the searching side
+    come first, preceded by first (the transposition-table pair) if offered, and the
+    offered killers come next.
+    """
+    stats = context.stats
+    cells_func = PAIR_CELLS.get(get_moves_func)
+    if cells_func is not None:
+        cells = cells_func(board) if stats is None else stats.time('move_generation', cells_func, board)
+        if len(cells) < 2:
+            return None
+        orbit_key = None
+        if get_moves_func in SYMMETRY_PAIRS:
+            symmetry = get_symmetry_tables(board.size)
+            orbit_key = symmetry.orbit_key(symmetry.stabilizer(board))
+        return ordered_pairs(board, cells, player, heuristic_func, original_player, best_high, context, first,
+                             killers, orbit_key)
+    if stats is None:
+        possible_moves_pairs = get_moves_func(board)
+    else:
+        possible_moves_pairs = stats.time('move_generation', get_moves_func, board)
+    if not possible_moves_pairs:
+        return None
+    history = context.history
+    sign = 1 if best_high else -1
+    possible_moves_pairs.sort(
+        key=lambda p: (sign * score_move_pair(board, p[0], p[1], player, heuristic_func, original_player, context),
+                       history.get((player, p[0]), 0) + history.get((player, p[1]), 0)),
+        reverse=True)
+    for killer in reversed(killers):
+        if killer in possible_moves_pairs[1:]:
+            possible_moves_pairs.remove(killer)
+            possible_moves_pairs.insert(1, killer)
+    if first in possible_moves_pairs:
+        possible_moves_pairs.remove(first)
+        possible_moves_pairs.insert(0, first)
+    return possible_moves_pairs
+
+
+def live_windows(board, player):
+    """
+    Return the number of windows holding win_length - 2 or more of player's stones and
+    none of the opponent's, from the board's tracker if it has one.
+    """
+    for tracker in board.evaluators.values():
+        return tracker.live[player]
+    return sum(len(scan_windows(board, player, stones)) for stones in range(board.win_length - 2, board.win_length))
+
+
+def window_empties(board, windows):
+    """Return the empty cells of each window, as a list of sets of (row, col)."""
+    tables = get_window_tables(board.size, board.win_length)
+    flat = board.flat
+    cell_of = board.layout.cell_of
+    return [{cell_of[cell] for cell in tables.cells[window] if flat[cell] == EMPTY} for window in windows]
+
+
+def quiescence_replies(board, player):
+    """
+    Return the pairs with which player, facing live windows of the opponent, blocks
+    them all, most forcing first; the list is empty if two stones cannot. A block
+    needing one stone is paired with the cells that give player a live window of their
+    own, which the opponent must answer in turn, then with cells of the opponent's next
+    threats.
+    """
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+    live_stones = board.win_length - 2
+    threats = window_empties(board, scan_windows(board, opponent, live_stones)
+                             + scan_windows(board, opponent, live_stones + 1))
+    union = sorted(set().union(*threats))
+    singles = [cell for cell in union if all(cell in cells for cells in threats)]
+    if not singles:
+        return [(a, b) for i, a in enumerate(union) for b in union[i + 1:]
+                if all(a in cells or b in cells for cells in threats)][:QUIESCENCE_WIDTH]
+    spares = sorted(set().union(*window_empties(board, scan_windows(board, player, live_stones - 1))))
+    spares += sorted(set().union(*window_empties(board, scan_windows(board, opponent, live_stones - 1)))
+                     - set(spares))
+    replies = [(block, spare) for block in singles for spare in spares if spare != block]
+    if not replies:
+        # Nothing to threaten or pre-empt; the spare stone goes on any candidate cell
+        for block in singles:
+            spare = next((cell for cell in board.get_candidate_moves() + union if cell != block), None)
+            if spare is not None:
+                replies.append((block, spare))
+    return replies[:QUIESCENCE_WIDTH]
+
+
+def quiescence(board, is_maximizing_player, heuristic_func, original_player, context, turns=QUIESCENCE_DEPTH):
+    """
+    Score a horizon position by playing on only forcing pairs until it is quiet.
+
+    A live window holds win_length - 2 or more stones of one player and none of the
+    other's, so its owner fills it next turn unless it is blocked. The side to move
+    wins at once if it has a live window. A position is quiet, and scored by the
+    heuristic, when the side to move faces none. Otherwise it must block them all (see
+    quiescence_replies), and loses if two stones cannot. The search plays at most
+    `turns` turns and context.quiescence_left pairs, then falls back to the heuristic.
+    Returns the score like alphabeta, from original_player's point of view.
+
+    No alpha-beta window is used: only a win for the side to move ends a turn early, so
+    the score, budget included, depends on the position alone. Searches of the same
+    position with different windows, such as the serial and parallel root searches,
+    then agree.
+    """
+    opponent = PLAYER_1 if original_player == PLAYER_2 else PLAYER_2
+    current_player = original_player if is_maximizing_player else opponent
+    other_player = opponent if is_maximizing_player else original_player
+    win_score = 10000000 if is_maximizing_player else -10000000
+    if live_windows(board, current_player):
+        return win_score
+    if not live_windows(board, other_player) or turns == 0 or context.quiescence_left <= 0:
+        return heuristic_func(board, original_player)
+    replies = quiescence_replies(board, current_player)
+    if not replies:
+        return -win_score  # more live windows than two stones can block
+    best_eval = -math.inf if is_maximizing_player else math.inf
+    stats = context.stats
+    for move1, move2 in replies:
+        if context.quiescence_left <= 0:
+            break
+        context.quiescence_left -= 1
+        context.nodes += 1
+        if stats is not None:
+            stats.quiescence_nodes += 1
+        if context.watched:
+            context.check_time()
+        board.make_move(move1[0], move1[1], current_player)
+        board.make_move(move2[0], move2[1], current_player)
+        try:
+            eval = quiescence(board, not is_maximizing_player, heuristic_func, original_player, context, turns - 1)
+        finally:
+            board.unmake_move()
+            board.unmake_move()
+        best_eval = max(best_eval, eval) if is_maximizing_player else min(best_eval, eval)
+        if best_eval == win_score:
+            break
+    if best_eval in (math.inf, -math.inf):
+        return heuristic_func(board, original_player)  # out of budget before a block was searched
+    return best_eval
+
+
+def alphabeta(board, depth, alpha, beta, is_maximizing_player, heuristic_func, get_moves_func, original_player,
+              context=None):
+    """
+    Implement alpha-beta pruning with improved threat detection.
+    """
+    if context is None:
+        context = SearchContext()
+    context.nodes += 1
+    if context.watched:
+        context.check_time()
+    stats = context.stats
+    if stats is not None:
+        stats.count_node(depth)
+
+    if depth == 0 or board.is_board_full():
+        if stats is not None:
+            stats.leaf_evaluations += 1
+        if depth == 0 and context.quiescence_nodes:
+            context.quiescence_left = context.quiescence_nodes
+            return quiescence(board, is_maximizing_player, heuristic_func, original_player, context), None
+        return heuristic_func(board, original_player), None
+
+    opponent = PLAYER_1 if original_player == PLAYER_2 else PLAYER_2
+    current_player = original_player if is_maximizing_player else opponent
+
+    tt = context.tt
+    tt_pair = None
+    if tt is not None:
+        key = board.hash ^ board.layout.zobrist_turn[current_player]
+        entry = tt.probe(key)
+        if entry is not None:
+            _, entry_depth, bound, score, tt_pair = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score, tt_pair
+                if bound == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score, tt_pair
+    alpha_orig, beta_orig = alpha, beta
+
+    # Check for immediate threats at the start of each node evaluation
+    if is_maximizing_player:
+        if stats is None:
+            threats = find_critical_threats(board, original_player)
+        else:
+            threats = stats.time('critical_threats', find_critical_threats, board, original_player)
+        if threats:
+            # If we're maximizing and find opponent threats, prioritize blocking
+            blocking_move = threats[0]
+            empty_spots = board.get_empty_intersections()
+            empty_spots.remove(blocking_move)
+            if empty_spots:
+                second_move = random.choice(empty_spots)
+                return float('inf'), (blocking_move, second_move)
+
+    # Search the stored best pair first; it is the likeliest to cause a cutoff. This depth's
+    # killers follow the best-scored pair
+    possible_moves_pairs = order_move_pairs(board, current_player, heuristic_func, get_moves_func, original_player,
+                                            is_maximizing_player, context, tt_pair, context.killers.get(depth, ()))
+    if possible_moves_pairs is None:
+        if stats is not None:
+            stats.leaf_evaluations += 1
+        return heuristic_func(board, original_player), None
+
+    win_score = 10000000 if is_maximizing_player else -10000000
+
+    def search_move_pair(move1, move2):
+        """Return the score of playing move1 and move2 for current_player, or None if the pair is illegal."""
+        if context.in_place:
+            if not board.make_move(move1[0], move1[1], current_player):
+                return None
+            try:
+                if board.check_win(move1[0], move1[1], current_player)[0]:
+                    return win_score
+                if not board.make_move(move2[0], move2[1], current_player):
+                    return None
+                try:
+                    if board.check_win(move2[0], move2[1], current_player)[0]:
+                        return win_score
+                    return alphabeta(board, depth - 1, alpha, beta, not is_maximizing_player, heuristic_func,
+                                     get_moves_func, original_player, context)[0]
+                finally:
+                    board.unmake_move()
+            finally:
+                board.unmake_move()
+
+        temp_board1 = board.copy()
+        if not temp_board1.make_move(move1[0], move1[1], current_player):
+            return None
+        if temp_board1.check_win(move1[0], move1[1], current_player)[0]:
+            return win_score
+        temp_board2 = temp_board1.copy()
+        if not temp_board2.make_move(move2[0], move2[1], current_player):
+            return None
+        if temp_board2.check_win(move2[0], move2[1], current_player)[0]:
+            return win_score
+        return alphabeta(temp_board2, depth - 1, alpha, beta, not is_maximizing_player, heuristic_func,
+                         get_moves_func, original_player, context)[0]
+
+    best_move_pair = None
+    searched = 0
+
+    if is_maximizing_player:
+        max_eval = -math.inf
+        for move1, move2 in possible_moves_pairs:
+            eval = search_move_pair(move1, move2)
+            if eval is None:
+                continue
+            searched += 1
+            if eval > max_eval:
+                max_eval = eval
+                best_move_pair = (move1, move2)
+                if depth == context.root_depth:
+                    context.root_best = (max_eval, best_move_pair)
+            alpha = max(alpha, eval)
+            if beta <= alpha:
+                context.record_cutoff(depth, current_player, (move1, move2))
+                break
+        best_eval = max_eval
+    else:
+        min_eval = math.inf
+        for move1, move2 in possible_moves_pairs:
+            eval = search_move_pair(move1, move2)
+            if eval is None:
+                continue
+            searched += 1
+            if eval < min_eval:
+                min_eval = eval
+                best_move_pair = (move1, move2)
+            beta = min(beta, eval)
+            if beta <= alpha:
+                context.record_cutoff(depth, current_player, (move1, move2))
+                break
+        best_eval = min_eval
+    if stats is not None:
+        stats.count_children(searched, beta <= alpha)
+
+    if tt is not None and best_move_pair is not None:
+        if best_eval <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_eval >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        tt.store(key, depth, bound, best_eval, best_move_pair)
+    return best_eval, best_move_pair
+
+
+def alphabeta_single(board, depth, alpha, beta, is_maximizing_player, heuristic_func, get_moves_func, original_player,
+                     context=None, first_stone=None, searched=(), values=None):
+    """
+    Alpha-beta search that plays each turn as two single-stone plies by the same player.
+
+    depth counts turns, as in alphabeta, and get_moves_func must be a generator in
+    PAIR_CELLS. Its cells are ordered and pruned separately for each stone, so a cutoff
+    on the first stone skips all of its pairs at once. At the second ply first_stone is
+    the stone already placed this turn, and searched holds the first stones tried before
+    it: their pairs with first_stone have been searched in the other order, so they are
+    skipped. values, the single-stone scores of the first ply's cells, orders the second
+    stone without scoring every cell again. Positions reached again in later turns come
+    from the transposition table, if any. Returns (score, pair) like alphabeta.
+    """
+    if context is None:
+        context = SearchContext()
+    context.nodes += 1
+    if context.watched:
+        context.check_time()
+    stats = context.stats
+    if stats is not None:
+        stats.count_node(depth)
+
+    if (first_stone is None and depth == 0) or board.is_board_full():
+        if stats is not None:
+            stats.leaf_evaluations += 1
+        if depth == 0 and first_stone is None and context.quiescence_nodes:
+            context.quiescence_left = context.quiescence_nodes
+            return quiescence(board, is_maximizing_player, heuristic_func, original_player, context), None
+        return heuristic_func(board, original_player), None
+
+    opponent = PLAYER_1 if original_player == PLAYER_2 else PLAYER_2
+    current_player = original_player if is_maximizing_player else opponent
+    other_player = opponent if is_maximizing_player else original_player
+    win_score = 10000000 if is_maximizing_player else -10000000
+
+    # Take a win this turn, with the stones left
+    if first_stone is None:
+        if stats is None:
+            wins = find_immediate_wins(board, current_player)
+        else:
+            wins = stats.time('immediate_wins', find_immediate_wins, board, current_player)
+        if wins:
+            return win_score, wins[0]
+    else:
+        if stats is None:
+            wins = find_critical_threats(board, other_player)
+        else:
+            wins = stats.time('critical_threats', find_critical_threats, board, other_player)
+        if wins:
+            return win_score, (first_stone, wins[0])
+
+    tt = context.tt
+    tt_stone = None
+    if tt is not None:
+        key = board.hash ^ board.layout.zobrist_turn[current_player]
+        if first_stone is not None:
+            key ^= board.layout.zobrist_second_stone
+        entry = tt.probe(key)
+        if entry is not None:
+            _, entry_depth, bound, score, tt_pair = entry
+            tt_stone = tt_pair[0] if first_stone is None else tt_pair[1]
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score, tt_pair
+                if bound == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score, tt_pair
+    alpha_orig, beta_orig = alpha, beta
+
+    # A cell that completes the opponent's six must be blocked; otherwise any candidate will do
+    if stats is None:
+        cells = find_critical_threats(board, current_player) or PAIR_CELLS[get_moves_func](board)
+    else:
+        cells = (stats.time('critical_threats', find_critical_threats, board, current_player)
+                 or stats.time('move_generation', PAIR_CELLS[get_moves_func], board))
+    if searched:
+        cells = [cell for cell in cells if cell not in searched]
+    if not cells:
+        if stats is not None:
+            stats.leaf_evaluations += 1
+        return heuristic_func(board, original_player), None
+
+    if values is None:
+        values = {}
+        for row, col in cells:
+            if context.watched:
+                context.check_time()
+            if context.in_place:
+                board.make_move(row, col, current_player)
+                values[row, col] = heuristic_func(board, original_player)
+                board.unmake_move()
+            else:
+                temp_board = board.copy()
+                temp_board.make_move(row, col, current_player)
+                values[row, col] = heuristic_func(temp_board, original_player)
+
+    # Order this stone's cells: the stored stone, the best-scored cell, this depth's killer
+    # stones, then the rest by single-stone score and history credit. Cells that only
+    # became candidates with the first stone have no score and go last
+    sign = 1 if is_maximizing_player else -1
+    scores = {cell: (sign * values[cell] if cell in values else -math.inf,
+                     context.history.get((current_player, cell), 0)) for cell in cells}
+    ordered = sorted(cells, key=scores.get, reverse=True)
+    half = 0 if first_stone is None else 1
+    for killer in reversed(context.killers.get(depth, ())):
+        if killer[half] in scores and killer[half] not in ordered[:1]:
+            ordered.remove(killer[half])
+            ordered.insert(1, killer[half])
+    if tt_stone in scores:
+        ordered.remove(tt_stone)
+        ordered.insert(0, tt_stone)
+
+    def search_stone(row, col):
+        """Return (score, pair) after current_player places a stone at (row, col)."""
+        if context.in_place:
+            child = board
+            child.make_move(row, col, current_player)
+        else:
+            child = board.copy()
+            child.make_move(row, col, current_player)
+        try:
+            if child.check_win(row, col, current_player)[0]:
+                if first_stone is not None:
+                    return win_score, (first_stone, (row, col))
+                return win_score, ((row, col), next(cell for cell in ordered if cell != (row, col)))
+            if first_stone is None:
+                return alphabeta_single(child, depth, alpha, beta, is_maximizing_player, heuristic_func,
+                                        get_moves_func, original_player, context, (row, col), tried, values)
+            score = alphabeta_single(child, depth - 1, alpha, beta, not is_maximizing_player, heuristic_func,
+                                     get_moves_func, original_player, context)[0]
+            return score, (first_stone, (row, col))
+        finally:
+            if context.in_place:
+                board.unmake_move()
+
+    best_eval = -math.inf if is_maximizing_player else math.inf
+    best_move_pair = None
+    tried = set()
+    scored = 0
+    for row, col in ordered:
+        eval, move_pair = search_stone(row, col)
+        tried.add((row, col))
+        if move_pair is None:
+            continue
+        scored += 1
+        if is_maximizing_player:
+            if eval > best_eval:
+                best_eval, best_move_pair = eval, move_pair
+                if depth == context.root_depth and first_stone is None:
+                    context.root_best = (best_eval, best_move_pair)
+            alpha = max(alpha, eval)
+        else:
+            if eval < best_eval:
+                best_eval, best_move_pair = eval, move_pair
+            beta = min(beta, eval)
+        if beta <= alpha:
+            context.record_cutoff(depth, current_player, move_pair)
+            break
+    if stats is not None:
+        stats.count_children(scored, beta <= alpha)
+
+    if best_move_pair is None:
+        return heuristic_func(board, original_player), None
+    if tt is not None:
+        if best_eval <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_eval >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        tt.store(key, depth, bound, best_eval, best_move_pair)
+    return best_eval, best_move_pair
+
+
+# --- Move Generation Functions ---
+
+def get_all_possible_pairs(board):
+    """Generate all possible pairs of empty intersections on the board."""
+    empty_spots = board.get_empty_intersections()
+    return pairs_of(empty_spots)
+
+
+def pairs_of(empty_spots):
+    """Return every pair of distinct spots from the list, in list order."""
+    possible_pairs = []
+    for i in range(len(empty_spots)):
+        for j in range(i + 1, len(empty_spots)):
+            possible_pairs.append((empty_spots[i], empty_spots[j]))
+    return possible_pairs
+
+
+def get_reduced_moves_pairs(board):
+    """
+    Generate move pairs from empty intersections near occupied spots,
+    reducing the search space but including critical threats.
+    """
+    return pairs_of(get_reduced_moves_cells(board))
+
+
+def get_reduced_moves_cells(board):
+    """Return the empty intersections that get_reduced_moves_pairs pairs up."""
+    # Always include spots that are part of critical threats
+    critical_threats = find_critical_threats(board, PLAYER_2)
+    nearby_empty_spots = set(critical_threats)
+    nearby_empty_spots.update(board.get_candidate_moves())
+
+    if not board.move_stack:
+        center = board.size // 2
+        for r in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
+            for c in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
+                if board.board[r][c] == EMPTY:
+                    nearby_empty_spots.add((r, c))
+
+    return list(nearby_empty_spots)
+
+
+def get_symmetry_reduced_pairs(board, heuristic_func=None, player=PLAYER_2):
+    """
+    Generate move pairs considering board symmetries, with priority to threat blocks.
+
+    Only the symmetries the position actually has are used: pairs that one of them maps
+    onto each other lead to equivalent positions, so just the first of each is kept.
+    heuristic_func is deprecated and ignored, as no heuristic is evaluated; it is kept
+    so that positional calls still pass player in third place.
+
+    alphabeta does not build this list: it streams the pairs of get_reduced_moves_cells
+    best-first and skips the symmetric ones as it goes (see SYMMETRY_PAIRS), and blocks
+    threats itself.
+    """
+    # Check for immediate threats first
+    threats = find_critical_threats(board, player)
+    if threats:
+        blocking_move = threats[0]
+        empty_spots = board.get_empty_intersections()
+        empty_spots.remove(blocking_move)
+        if empty_spots:
+            second_move = random.choice(empty_spots)
+            return [(blocking_move, second_move)]
+
+    # Proceed with symmetry reduction if no immediate threats
+    empty_spots = sorted(get_reduced_moves_cells(board))
+    symmetry = get_symmetry_tables(board.size)
+    return symmetry.unique_pairs(pairs_of(empty_spots), symmetry.stabilizer(board))
+
+
+# Window weights and open-end multipliers of the heuristics, for get_window_scores
+INCREMENTAL_WEIGHTS = {
+    evaluate: (EVALUATE_PLAYER_WEIGHTS, EVALUATE_OPPONENT_WEIGHTS, lambda k, open_ends: (1, 1.5, 2)[open_ends]),
+    threat_focused_heuristic: (THREAT_PLAYER_WEIGHTS, THREAT_OPPONENT_WEIGHTS,
+                               lambda k, open_ends: (1, 2, 4)[open_ends]),
+    heuristic_open_three: (OPEN_THREE_PLAYER_WEIGHTS, OPEN_THREE_OPPONENT_WEIGHTS,
+                           lambda k, open_ends: (1, 3, 5)[open_ends] if k == 3 else (1, 1.5, 2)[open_ends]),
+}
+
+
+# --- Threat-Space Search ---
+
+class ThreatSpaceSearch:
+    """
+    Forced-win search that only plays threat moves.
+
+    A window is live for a player when it holds at least win_length - 2 of their stones
+    and none of the opponent's: the player completes it next turn unless it is blocked.
+    The attacker only plays pairs that create live windows. The defender only plays pairs
+    that block every live window; a spare stone goes on a cell the attacker could still
+    build on. The attacker wins when a turn leaves more live windows than two stones can
+    block. The search stays inside this threat space, so it is far narrower than the
+    full-width pair search and can look many turns ahead.
+    """
+
+    def __init__(self, board, attacker, max_nodes=THREAT_SEARCH_NODES):
+        self.board = board.copy(with_evaluators=False)
+        self.attacker = attacker
+        self.defender = PLAYER_1 if attacker == PLAYER_2 else PLAYER_2
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.win_length = board.win_length
+        self.tables = get_window_tables(board.size, board.win_length)
+        count = len(self.tables.cells)
+        self.counts = [None, [0] * count, [0] * count]
+        # Windows per player holding >= win_length - 2 (live) and >= 2 (building) stones, uncontested
+        self.live = [None, set(), set()]
+        self.building = [None, set(), set()]
+        for row, col in self.board.move_stack:
+            self._count(row, col, self.board.board[row][col], 1)
+
+    def _count(self, row, col, player, delta):
+        """Adjust the window counts for a stone of player added (delta=1) or removed (delta=-1)."""
+        ones, twos = self.counts[PLAYER_1], self.counts[PLAYER_2]
+        counts = self.counts[player]
+        live_stones = self.win_length - 2
+        for window in self.tables.windows_at[row * self.board.layout.stride + col]:
+            counts[window] += delta
+            for p, own, other in ((PLAYER_1, ones[window], twos[window]), (PLAYER_2, twos[window], ones[window])):
+                if other == 0 and own >= live_stones:
+                    self.live[p].add(window)
+                else:
+                    self.live[p].discard(window)
+                if other == 0 and own >= 2:
+                    self.building[p].add(window)
+                else:
+                    self.building[p].discard(window)
+
+    def _play(self, cells, player):
+        for row, col in cells:
+            self.board.make_move(row, col, player)
+            self._count(row, col, player, 1)
+
+    def _undo(self, cells, player):
+        for row, col in reversed(cells):
+            self.board.unmake_move()
+            self._count(row, col, player, -1)
+
+    def _empties(self, window):
+        flat = self.board.flat
+        cell_of = self.board.layout.cell_of
+        return [cell_of[cell] for cell in self.tables.cells[window] if flat[cell] == EMPTY]
+
+    def _blocking_pairs(self, player):
+        """
+        Return every set of at most two cells that blocks all of player's live windows,
+        as a list of tuples, or [] if two stones are not enough.
+        """
+        window_cells = [set(self._empties(window)) for window in self.live[player]]
+        union = set().union(*window_cells)
+        singles = [cell for cell in union if all(cell in cells for cells in window_cells)]
+        if singles:
+            return [(cell,) for cell in singles]
+        union = sorted(union)
+        return [(a, b) for i, a in enumerate(union) for b in union[i + 1:]
+                if all(a in cells or b in cells for cells in window_cells)]
+
+    def _threat_pairs(self, player):
+        """Return the pairs that give player at least one live window, most threatening first."""
+        singles = set()
+        pairs = set()
+        for window in self.building[player]:
+            empties = self._empties(window)
+            stones = self.win_length - len(empties)
+            if stones == self.win_length - 3:
+                singles.update(empties)
+            elif stones == self.win_length - 4:
+                pairs.update((a, b) for i, a in enumerate(empties) for b in empties[i + 1:])
+        ordered = sorted(singles)
+        pairs.update((a, b) for i, a in enumerate(ordered) for b in ordered[i + 1:])
+        # Two single-stone threats force the defender to spend both stones, so try them first
+        return sorted(pairs, key=lambda pair: (pair[0] in singles) + (pair[1] in singles), reverse=True)
+
+    def _spare_cells(self, player):
+        """Return the empty cells of player's building windows, where a spare defending stone matters."""
+        cells = set()
+        for window in self.building[player]:
+            cells.update(self._empties(window))
+        return cells
+
+    def _winning_pair(self, player):
+        """Return a pair completing one of player's live windows, or None."""
+        for window in self.live[player]:
+            empties = self._empties(window)
+            if len(empties) == 1:
+                spare = next((cell for cell in self.board.get_empty_intersections() if cell != empties[0]), None)
+                return (empties[0], spare) if spare else None
+            return tuple(empties)
+        return None
+
+    def attack(self, depth=THREAT_SEARCH_DEPTH):
+        """Return the attacker's first pair of a forced win found within depth turns, or None."""
+        attacker, defender = self.attacker, self.defender
+        self.nodes += 1
+        if self.live[attacker]:
+            return self._winning_pair(attacker)
+        if self.live[defender] or depth == 0 or self.nodes >= self.max_nodes:
+            return None  # the attacker would have to defend, or the search is out of budget
+        pairs = self._threat_pairs(attacker)
+        # A pair leaving more live windows than two stones can block wins outright; look for one first
+        for pair in pairs:
+            self.nodes += 1
+            self._play(pair, attacker)
+            try:
+                unblockable = not self._blocking_pairs(attacker)
+            finally:
+                self._undo(pair, attacker)
+            if unblockable:
+                return pair
+        if depth == 1:
+            return None
+        for pair in pairs:
+            if self.nodes >= self.max_nodes:
+                break
+            self._play(pair, attacker)
+            try:
+                defended = self._defended(depth)
+            finally:
+                self._undo(pair, attacker)
+            if not defended:
+                return pair
+        return None
+
+    def _defended(self, depth):
+        """Check if the defender, to move, has a reply that refutes every continuation of the attack."""
+        attacker, defender = self.attacker, self.defender
+        blocks = self._blocking_pairs(attacker)
+        if not blocks:
+            return False
+        spare = sorted(self._spare_cells(attacker))
+        for block in blocks:
+            if len(block) == 2:
+                replies = [block]
+            else:
+                cells = [cell for cell in spare if cell != block[0]] or \
+                    [cell for cell in self.board.get_empty_intersections() if cell != block[0]][:1]
+                replies = [block + (cell,) for cell in cells]
+            for reply in replies:
+                self._play(reply, defender)
+                try:
+                    if self.nodes >= self.max_nodes or self.attack(depth - 1) is None:
+                        return True
+                finally:
+                    self._undo(reply, defender)
+        return False
+
+    def shortest_attack(self, max_depth=THREAT_SEARCH_DEPTH):
+        """Deepen the attack one turn at a time; return (pair, depth) of the shortest forced win, or (None, None)."""
+        for depth in range(1, max_depth + 1):
+            pair = self.attack(depth)
+            if pair is not None:
+                return pair, depth
+            if self.nodes >= self.max_nodes:
+                break
+        return None, None
+
+    def defend(self, attack_pair, depth):
+        """
+        Return a pair for the defender, to move, that leaves the attacker without a forced win
+        within depth turns, or None if no such pair was found within the node budget.
+        attack_pair is the attacker's winning first pair; replies touching it are tried first.
+        """
+        attacker, defender = self.attacker, self.defender
+        candidates = set(self._spare_cells(attacker)) | set(attack_pair)
+        for window in self.live[attacker]:
+            candidates.update(self._empties(window))
+        candidates = sorted(candidates)
+        blocks = self._blocking_pairs(attacker) if self.live[attacker] else None
+        pairs = [(a, b) for i, a in enumerate(candidates) for b in candidates[i + 1:]
+                 if blocks is None or any(all(cell in (a, b) for cell in block) for block in blocks)]
+        pairs.sort(key=lambda pair: (pair[0] in attack_pair) + (pair[1] in attack_pair), reverse=True)
+        for pair in pairs:
+            if self.nodes >= self.max_nodes:
+                return None
+            self._play(pair, defender)
+            try:
+                refuted = self.attack(depth) is None and self.nodes < self.max_nodes
+            finally:
+                self._undo(pair, defender)
+            if refuted:
+                return pair
+        return None
+
+
+def threat_space_search(board, player, max_nodes=THREAT_SEARCH_NODES, max_depth=THREAT_SEARCH_DEPTH):
+    """
+    Look for a forced win for player, then for a defence against the opponent's shortest
+    forced win. Return (move_pair, kind) with kind 'win' or 'defence', or (None, None).
+    """
+    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+    search = ThreatSpaceSearch(board, player, max_nodes)
+    win, _ = search.shortest_attack(max_depth)
+    if win is not None:
+        return win, 'win'
+    threat_search = ThreatSpaceSearch(board, opponent, max(max_nodes - search.nodes, 0))
+    attack_pair, depth = threat_search.shortest_attack(max_depth)
+    if attack_pair is None:
+        return None, None
+    # Proving the opponent has no win at all is too costly; refute wins as short as the one found
+    defence = threat_search.defend(attack_pair, depth)
+    if defence is not None:
+        return defence, 'defence'
+    return None, None
+
+
+# --- Board Symmetry ---
+
+# The 8 symmetries of the square (the dihedral group D4), as maps of (row, col) on a
+# board of size n: rotations by 0, 90, 180 and 270 degrees, then reflections in the
+# horizontal and vertical axes and in the main and anti-diagonal.
+D4_TRANSFORMS = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n - 1 - r),
+    lambda r, c, n: (n - 1 - r, n - 1 - c),
+    lambda r, c, n: (n - 1 - c, r),
+    lambda r, c, n: (r, n - 1 - c),
+    lambda r, c, n: (n - 1 - r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n - 1 - c, n - 1 - r),
+)
+# Index of the inverse of each transform: the 90 and 270 degree rotations undo each other
+D4_INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+
+
+class SymmetryTables:
+    """Permutation tables of the D4 transforms on a board of the given size, by bit index."""
+
+    def __init__(self, size):
+        self.size = size
+        layout = get_layout(size)
+        self.layout = layout
+        # bit_perms[t][i]: bit index of the image of cell i under transform t (None for guard bits)
+        self.bit_perms = []
+        for transform in D4_TRANSFORMS:
+            perm = [None] * len(layout.cell_of)
+            for index, cell in enumerate(layout.cell_of):
+                if cell is not None:
+                    row, col = transform(cell[0], cell[1], size)
+                    perm[index] = row * layout.stride + col
+            self.bit_perms.append(perm)
+
+    def transform_cell(self, t, cell):
+        """Return the image of (row, col) under transform t."""
+        return self.layout.cell_of[self.bit_perms[t][cell[0] * self.layout.stride + cell[1]]]
+
+    def stabilizer(self, board):
+        """Return the transforms that map board onto itself, starting with the identity."""
+        stride = self.layout.stride
+        stones = [(board.stones[board.board[r][c]], r * stride + c) for r, c in board.move_stack]
+        transforms = [0]
+        for t in range(1, len(self.bit_perms)):
+            perm = self.bit_perms[t]
+            # The transform is a bijection, so it fixes the board if every stone lands on one of its own colour
+            if all(own >> perm[index] & 1 for own, index in stones):
+                transforms.append(t)
+        return transforms
+
+    def orbit_key(self, transforms):
+        """
+        Return a function mapping a pair to the key of its class of pairs that the given
+        transforms map onto each other, or None if transforms is only the identity.
+        transforms must be a group, such as a board's stabilizer.
+        """
+        if len(transforms) == 1:
+            return None
+        perms = [self.bit_perms[t] for t in transforms]
+        stride = self.layout.stride
+
+        def key(pair):
+            (row1, col1), (row2, col2) = pair
+            index1 = row1 * stride + col1
+            index2 = row2 * stride + col2
+            return min((perm[index1], perm[index2]) if perm[index1] < perm[index2] else (perm[index2], perm[index1])
+                       for perm in perms)
+        return key
+
+    def unique_pairs(self, pairs, transforms):
+        """
+        Return the first pair of each class of pairs that the given transforms map onto
+        each other, in order. transforms must be a group, such as a board's stabilizer.
+        """
+        key = self.orbit_key(transforms)
+        if key is None:
+            return pairs
+        seen = set()
+        unique = []
+        for pair in pairs:
+            pair_key = key(pair)
+            if pair_key not in seen:
+                seen.add(pair_key)
+                unique.append(pair)
+        return unique
+
+    def canonical_hash(self, board, player):
+        """
+        Return (key, t): the smallest Zobrist hash, with player to move, over the 8
+        transformed copies of board, and a transform t that produces it.
+        """
+        zobrist = self.layout.zobrist
+        stride = self.layout.stride
+        stones = [(board.board[r][c], r * stride + c) for r, c in board.move_stack]
+        best = None
+        for t, perm in enumerate(self.bit_perms):
+            key = self.layout.zobrist_turn[player]
+            for stone_player, index in stones:
+                key ^= zobrist[stone_player][perm[index]]
+            if best is None or key < best[0]:
+                best = (key, t)
+        return best
+
+
+_SYMMETRY_TABLES = {}
+
+
+def get_symmetry_tables(size):
+    """Return the shared SymmetryTables for a board of the given size."""
+    tables = _SYMMETRY_TABLES.get(size)
+    if tables is None:
+        tables = _SYMMETRY_TABLES[size] = SymmetryTables(size)
+    return tables
+
+
+# --- Opening Book ---
+
+# File layout: a header (magic, board size, win length, record count, AI type length),
+# the AI type that built the book, then fixed-size records (canonical key, row1, col1,
+# row2, col2) sorted by key. Pairs are stored in the frame of the canonical transform
+# and mapped back to the actual board on lookup.
+BOOK_MAGIC = b"C6BOOK03"
+BOOK_HEADER = struct.Struct("<8sIIIH")
+BOOK_RECORD = struct.Struct("<Q4B")
+
+
+class OpeningBook:
+    """
+    Read-only opening book: canonical position key -> best pair, memory-mapped from disk.
+
+    Opening the book only reads its header; lookups binary-search the mapped records,
+    so even a large book costs nothing at startup. ai_type is the AI config whose
+    searches filled the book.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.size, self.win_length, self.count, type_length = BOOK_HEADER.unpack_from(self.data, 0)
+            self.offset = BOOK_HEADER.size + type_length
+            self.ai_type = self.data[BOOK_HEADER.size:self.offset].decode('utf-8')
+        except (struct.error, UnicodeDecodeError):
+            magic = None
+        if magic != BOOK_MAGIC or len(self.data) < self.offset + self.count * BOOK_RECORD.size:
+            self.data.close()
+            raise ValueError(f"{path} is not a Connect 6 opening book")
+        self.symmetry = get_symmetry_tables(self.size)
+
+    def record(self, index):
+        """Return the index-th record as (key, row1, col1, row2, col2)."""
+        return BOOK_RECORD.unpack_from(self.data, self.offset + index * BOOK_RECORD.size)
+
+    def _find(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = self.record(middle)
+            if record[0] < key:
+                low = middle + 1
+            elif record[0] > key:
+                high = middle
+            else:
+                return record
+        return None
+
+    def lookup(self, board, player):
+        """Return the book pair for player to move on board, or None if the position is not in the book."""
+        if board.size != self.size or board.win_length != self.win_length:
+            return None
+        key, t = self.symmetry.canonical_hash(board, player)
+        record = self._find(key)
+        if record is None:
+            return None
+        inverse = D4_INVERSE[t]
+        move1 = self.symmetry.transform_cell(inverse, (record[1], record[2]))
+        move2 = self.symmetry.transform_cell(inverse, (record[3], record[4]))
+        if not (board.is_valid_move(*move1) and board.is_valid_move(*move2)) or move1 == move2:
+            return None
+        return move1, move2
+
+    def close(self):
+        self.data.close()
+
+
+def write_opening_book(path, size, entries, win_length=WIN_SEQUENCE, ai_type=AI_HEURISTIC_REDUCTION):
+    """
+    Write an opening book of {canonical key: pair in the canonical frame} entries, found
+    by ai_type's searches, to path.
+    """
+    name = ai_type.encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, size, win_length, len(entries), len(name)))
+        f.write(name)
+        for key in sorted(entries):
+            (row1, col1), (row2, col2) = entries[key]
+            f.write(BOOK_RECORD.pack(key, row1, col1, row2, col2))
+
+
+_OPENING_BOOKS = {}
+
+
+def get_opening_book(path=OPENING_BOOK_FILE):
+    """Return the opening book at path, opened once per process, or None if there is no usable book."""
+    if path not in _OPENING_BOOKS:
+        book = None
+        if os.path.exists(path):
+            try:
+                book = OpeningBook(path)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring opening book {path}: {e}")
+        _OPENING_BOOKS[path] = book
+    return _OPENING_BOOKS[path]
+
+
+# Move generators that pair up every cell of a candidate list, mapped to that list.
+# alphabeta streams their pairs best-first from the cells instead of building every pair.
+PAIR_CELLS = {
+    get_all_possible_pairs: Board.get_empty_intersections,
+    get_reduced_moves_pairs: get_reduced_moves_cells,
+    get_symmetry_reduced_pairs: get_reduced_moves_cells,
+}
+
+# Generators in PAIR_CELLS whose streamed pairs skip those a symmetry of the board maps
+# onto a pair already streamed
+SYMMETRY_PAIRS = {get_symmetry_reduced_pairs}
+
+
+# --- AI Selection and Execution ---
+
+# "search" picks the search function (alphabeta unless given); the parallel root search
+# ("workers" > 1) always splits alphabeta's root pairs. "quiescence" is the number of
+# pairs the quiescence search may play per horizon position (0 or absent: none)
+AI_CONFIGS = {
+    AI_MINIMAX_ONLY: {
+        "heuristic": evaluate,
+        "moves_func": get_all_possible_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_MINIMAX_ALPHA_BETA: {
+        "heuristic": evaluate,
+        "moves_func": get_all_possible_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_HEURISTIC_BLOCK_THREATS: {
+        "heuristic": threat_focused_heuristic,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: min(x, 2),
+        "workers": 1
+    },
+    AI_MINIMAX_WITH_THREATS: {
+        "heuristic": threat_focused_heuristic,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_HEURISTIC_OPEN_THREE: {
+        "heuristic": heuristic_open_three,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: min(x, 2),
+        "workers": 1
+    },
+    AI_MINIMAX_WITH_OPEN_THREE: {
+        "heuristic": heuristic_open_three,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_HEURISTIC_REDUCTION: {
+        "heuristic": evaluate,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_SYMMETRY_REDUCTION: {
+        "heuristic": evaluate,
+        "moves_func": get_symmetry_reduced_pairs,
+        "depth": lambda x: x,
+        "workers": 1
+    },
+    AI_SINGLE_STONE: {
+        "heuristic": evaluate,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: x,
+        "workers": 1,
+        "search": alphabeta_single
+    },
+    AI_QUIESCENCE: {
+        "heuristic": evaluate,
+        "moves_func": get_reduced_moves_pairs,
+        "depth": lambda x: x,
+        "workers": 1,
+        "quiescence": QUIESCENCE_NODES
+    }
+}
+
+
+def iterative_deepening(board, max_depth, heuristic_func, get_moves_func, player, tt, time_budget, stop=None,
+                        progress=None, search_func=alphabeta, node_budget=None, stats=None, quiescence_nodes=0):
+    """
+    Search depth 1, 2, 3, ... up to max_depth until time_budget seconds have passed, or
+    node_budget nodes have been searched. Either budget may be None.
+
+    Each iteration shares tt with the previous ones, so the root's stored best pair from
+    depth d - 1 is searched first at depth d. Returns (score, move_pair, depth, nodes) for
+    the deepest completed iteration. If even depth 1 runs out of time, the best root pair
+    it had scored so far is returned with depth 0. stop ends the search early in the same
+    way; progress is called with (depth, nodes, best_pair) as the search goes.
+    search_func is alphabeta or a search with the same signature, such as alphabeta_single.
+    stats, an optional SearchStats, is filled by every iteration. quiescence_nodes is
+    passed to each iteration's SearchContext.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_budget if time_budget is not None else None
+    best_score, best_move_pair = None, None
+    depth_reached = 0
+    nodes = 0
+    for depth in range(1, max_depth + 1):
+        report = None
+        if progress is not None:
+            def report(context, depth=depth, done=nodes, best=best_move_pair):
+                progress(depth, done + context.nodes, context.root_best[1] if context.root_best else best)
+        max_nodes = node_budget - nodes if node_budget is not None else None
+        context = SearchContext(tt=tt, deadline=deadline, root_depth=depth, stop=stop, progress=report,
+                                max_nodes=max_nodes, stats=stats, quiescence_nodes=quiescence_nodes)
+        try:
+            score, move_pair = search_func(board, depth, -math.inf, math.inf, True, heuristic_func, get_moves_func,
+                                           player, context)
+        except SearchTimeout:
+            nodes += context.nodes
+            if best_move_pair is None and context.root_best is not None:
+                best_score, best_move_pair = context.root_best
+            break
+        nodes += context.nodes
+        best_score, best_move_pair = score, move_pair
+        depth_reached = depth
+        if move_pair is None or abs(score) >= 10000000:
+            break  # nothing to search or the result is already a forced win/loss
+        # The next iteration takes several times longer than this one; don't start it
+        # if it has little chance of finishing
+        if time_budget is not None and time.perf_counter() - start_time > time_budget / 2:
+            break
+        if node_budget is not None and nodes > node_budget / 2:
+            break
+    return best_score, best_move_pair, depth_reached, nodes
+
+
+# --- Parallel Root Search ---
+
+class RootWorker:
+    """
+    One process of a parallel root search: a private board copy, transposition table and
+    SearchContext, plus the best (score, index) over all workers in shared memory. The
+    context's killers and history carry over from one root pair to the next, as they do
+    between the root pairs of the serial search. The table starts as a copy of the
+    caller's, if any. Once the shared stopped flag is set, searches are abandoned.
+
+    Root pairs are searched with alpha taken from the shared best. A pair whose score
+    beats that alpha is exact, and it replaces the shared best if it scores higher, or
+    ties from an earlier pair in root order. To find the same pair as the serial search,
+    a pair earlier in the order than the shared best is searched with alpha just below
+    the shared best, so that a tie still comes back exact.
+    """
+
+    def __init__(self, board, ai_type, depth, player, shared_best, stopped, tt=None):
+        config = AI_CONFIGS.get(ai_type, AI_CONFIGS[AI_MINIMAX_ALPHA_BETA])
+        self.board = board
+        self.heuristic = config["heuristic"]
+        self.moves_func = config["moves_func"]
+        self.depth = depth
+        self.player = player
+        self.shared_best = shared_best
+        self.stopped = stopped
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.context = SearchContext(tt=self.tt, stop=lambda: stopped.value != 0,
+                                     quiescence_nodes=config.get("quiescence", 0))
+        self.board.attach_evaluator(self.heuristic)
+
+    def search(self, index, pair):
+        """
+        Search one root pair. Return (index, score, exact, nodes, reply), where reply is
+        the opponent's best answer, if any; score is None if the search was stopped.
+        """
+        if self.stopped.value:
+            return index, None, False, 0, None
+        with self.shared_best.get_lock():
+            best_score, best_index = self.shared_best[0], self.shared_best[1]
+        alpha = best_score if best_index < index else math.nextafter(best_score, -math.inf)
+        context = self.context
+        context.nodes = 0
+        board = self.board
+        (row1, col1), (row2, col2) = pair
+        reply = None
+        board.make_move(row1, col1, self.player)
+        try:
+            if board.check_win(row1, col1, self.player)[0]:
+                score = 10000000
+            else:
+                board.make_move(row2, col2, self.player)
+                try:
+                    if board.check_win(row2, col2, self.player)[0]:
+                        score = 10000000
+                    else:
+                        score, reply = alphabeta(board, self.depth - 1, alpha, math.inf, False, self.heuristic,
+                                                 self.moves_func, self.player, context)
+                finally:
+                    board.unmake_move()
+        except SearchTimeout:
+            return index, None, False, context.nodes, None
+        finally:
+            board.unmake_move()
+        exact = score > alpha
+        if exact:
+            with self.shared_best.get_lock():
+                if score > self.shared_best[0] or (score == self.shared_best[0] and index < self.shared_best[1]):
+                    self.shared_best[0], self.shared_best[1] = score, index
+        return index, score, exact, context.nodes, reply
+
+
+# The RootWorker of this process, set by init_root_worker in pool processes
+root_worker = None
+
+
+def init_root_worker(board, ai_type, depth, player, shared_best, stopped, tt):
+    """ProcessPoolExecutor initializer: set up this process's RootWorker."""
+    global root_worker
+    root_worker = RootWorker(board, ai_type, depth, player, shared_best, stopped, tt)
+
+
+def search_root_pairs(start, pairs):
+    """ProcessPoolExecutor task: search a chunk of root pairs, from index start, in this process's RootWorker."""
+    return [root_worker.search(index, pair) for index, pair in enumerate(pairs, start)]
+
+
+def parallel_root_search(board, ai_type, depth, player, workers, tt=None, stop=None, progress=None):
+    """
+    Search the root pairs of board across worker processes.
+
+    The root pairs are ordered exactly as alphabeta orders them and handed out in that
+    order, in chunks of consecutive pairs. Workers share the best score found so far,
+    which serves as every later search's alpha bound. Returns (score, move_pair, nodes,
+    complete): the same score and pair as the serial alphabeta at this depth, with
+    complete True.
+
+    tt, if given, is copied into every worker, and receives the root's result and the
+    opponent's expected reply to its pair. stop is polled as the workers run; once it
+    returns True they abandon their searches, and the best root pair scored so far (or
+    else the first in root order, with score None) comes back with complete False.
+    progress is called with (depth, nodes, best_pair) as chunks of root pairs finish.
+    """
+    config = AI_CONFIGS.get(ai_type, AI_CONFIGS[AI_MINIMAX_ALPHA_BETA])
+    heuristic_func, get_moves_func = config["heuristic"], config["moves_func"]
+    if depth < 2 or find_critical_threats(board, player):
+        # Nothing to split, or the root answers with a block without searching
+        report = None
+        if progress is not None:
+            def report(context):
+                progress(depth, context.nodes, context.root_best[1] if context.root_best else None)
+        context = SearchContext(tt=tt, root_depth=depth, stop=stop, progress=report,
+                                quiescence_nodes=config.get("quiescence", 0))
+        try:
+            score, move_pair = alphabeta(board, depth, -math.inf, math.inf, True, heuristic_func, get_moves_func,
+                                         player, context)
+        except SearchTimeout:
+            score, move_pair = context.root_best or (None, None)
+            return score, move_pair, context.nodes, False
+        return score, move_pair, context.nodes, True
+
+    context = SearchContext()
+    context.nodes = 1
+    pairs = order_move_pairs(board, player, heuristic_func, get_moves_func, player, True, context)
+    if pairs is None:
+        return heuristic_func(board, player), None, context.nodes, True
+    pairs = list(pairs)
+    shared_best = multiprocessing.Array('d', [-math.inf, len(pairs)])
+    stopped = multiprocessing.Value('b', 0, lock=False)
+    chunksize = max(1, len(pairs) // (workers * ROOT_CHUNKS_PER_WORKER))
+    best_score, best_index, best_reply = -math.inf, len(pairs), None
+    nodes = context.nodes
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_root_worker,
+                             initargs=(board, ai_type, depth, player, shared_best, stopped, tt)) as pool:
+        pending = {pool.submit(search_root_pairs, start, pairs[start:start + chunksize])
+                   for start in range(0, len(pairs), chunksize)}
+        while pending:
+            done, pending = wait(pending, timeout=ROOT_POLL_INTERVAL)
+            for future in done:
+                for index, score, exact, pair_nodes, reply in future.result():
+                    nodes += pair_nodes
+                    # Chunks finish in any order, so keep the first of equal pairs in root order
+                    if exact and (score > best_score or (score == best_score and index < best_index)):
+                        best_score, best_index, best_reply = score, index, reply
+            if done and progress is not None:
+                progress(depth, nodes, pairs[best_index] if best_index < len(pairs) else None)
+            if pending and not stopped.value and stop is not None and stop():
+                stopped.value = 1
+
+    complete = not stopped.value
+    if best_index == len(pairs):
+        # Stopped before any pair was scored: the pair the search would have tried first
+        return None, pairs[0], nodes, complete
+    best_move_pair = pairs[best_index]
+    if complete and tt is not None:
+        tt.store(board.hash ^ board.layout.zobrist_turn[player], depth, EXACT, best_score, best_move_pair)
+        if best_reply is not None:
+            # The reply predict_reply looks for when pondering
+            opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
+            for row, col in best_move_pair:
+                board.make_move(row, col, player)
+            tt.store(board.hash ^ board.layout.zobrist_turn[opponent], depth - 1, EXACT, best_score, best_reply)
+            board.unmake_move()
+            board.unmake_move()
+    return best_score, best_move_pair, nodes, complete
+
+
+def select_ai_move(board, ai_type, max_depth, tt=None, time_budget=None, stop=None, progress=None,
+                   player=PLAYER_2, node_budget=None, stats=None, use_book=True):
+    """
+    Select the best move pair for the AI with improved defensive play.
+
+    Pass a TranspositionTable as tt to keep search results between moves; otherwise
+    a fresh table is used for this move only. With time_budget (seconds) the search
+    deepens iteratively up to max_depth and stops when the budget is spent; node_budget
+    does the same with a number of nodes, which repeats exactly from run to run. Otherwise,
+    if the AI config asks for more than one worker, the root pairs are split across
+    that many processes (see parallel_root_search), each starting from a copy of tt.
+
+    stop, a function polled during the search, makes the AI move now once it returns
+    True. With stop, a fixed-depth search also deepens iteratively up to its depth, so
+    the move played is the deepest completed iteration's pair, or the best root pair
+    scored so far if depth 1 was cut short. progress is called with (depth, nodes,
+    best_pair) every AI_PROGRESS_NODES nodes. The parallel root search does not deepen:
+    stop plays the best root pair scored so far, and progress is called as its chunks
+    of root pairs finish.
+
+    Positions found in the opening book (see get_opening_book) are played from the book
+    without searching, if the book was built by ai_type's config and use_book is true.
+
+    player is the side to move; the GUI's AI always plays PLAYER_2.
+
+    stats, an optional SearchStats, collects counters and timings for this move, which
+    are also logged as one JSON line. The parallel root search only adds its time.
+
+    The returned time is a SearchTime: a float of seconds with .depth, .nodes, .score
+    and .source.
+    """
+    start_time = time.perf_counter()
+    config = AI_CONFIGS.get(ai_type, AI_CONFIGS[AI_MINIMAX_ALPHA_BETA])
+    if stats is not None:
+        # Count this move's table use, not the table's lifetime totals
+        stats.moves += 1
+        tt_probes, tt_hits = (tt.probes, tt.hits) if tt is not None else (0, 0)
+
+    def timed(kind, func, *args):
+        return func(*args) if stats is None else stats.time(kind, func, *args)
+
+    def finish(move_pair, time_taken):
+        if stats is not None:
+            if tt is not None:
+                stats.tt_probes += tt.probes - tt_probes
+                stats.tt_hits += tt.hits - tt_hits
+            logging.info(f"Search stats: {json.dumps(stats.to_dict())}")
+        return move_pair, time_taken
+
+    # Check for critical threats that must be blocked
+    def find_critical_blocks():
+        blocks = timed('critical_threats', find_critical_threats, board, player)
+        for block in blocks:
+            logging.info(f"Critical block needed at {block}")
+        return blocks
+
+    # Use immediate win if found
+    immediate_wins = timed('immediate_wins', find_immediate_wins, board, player)
+    if immediate_wins:
+        selected_pair = random.choice(immediate_wins)
+        end_time = time.perf_counter()
+        return finish(selected_pair, SearchTime(end_time - start_time, source='win'))
+
+    # Block critical threats first
+    critical_blocks = find_critical_blocks()
+    if critical_blocks:
+        blocking_move = critical_blocks[0]
+        empty_spots = board.get_empty_intersections()
+        empty_spots.remove(blocking_move)
+        if empty_spots:
+            second_move = random.choice(empty_spots)
+            end_time = time.perf_counter()
+            logging.info(f"Blocking critical threat at {blocking_move} with second move at {second_move}")
+            return finish((blocking_move, second_move), SearchTime(end_time - start_time, source='block'))
+
+    # Book move for a known opening position
+    book = get_opening_book() if use_book else None
+    if book is not None and book.ai_type != ai_type:
+        book = None  # another config's moves would skew comparisons between configs
+    book_pair = timed('book', book.lookup, board, player) if book is not None else None
+    if book_pair is not None:
+        end_time = time.perf_counter()
+        logging.info(f"Opening book move: {book_pair}")
+        return finish(book_pair, SearchTime(end_time - start_time, source='book'))
+
+    # Forced wins and defences many turns deep, found cheaply in threat space
+    threat_pair, threat_kind = timed('threat_space', threat_space_search, board, player)
+    if threat_pair is not None:
+        end_time = time.perf_counter()
+        logging.info(f"Threat-space {threat_kind} found: {threat_pair}")
+        return finish(threat_pair, SearchTime(end_time - start_time, source='threat'))
+
+    # Otherwise, use the configured AI strategy
+    search_board = board.copy()
+    search_board.attach_evaluator(config["heuristic"])
+    if tt is None:
+        tt = TranspositionTable()
+    search_depth = config["depth"](max_depth)
+    search_func = config.get("search", alphabeta)
+    heuristic = config["heuristic"] if stats is None else stats.timed('heuristic', config["heuristic"])
+    workers = config.get("workers", 1)
+    # A daemonic process may not start the pool's processes, so it searches serially
+    if time_budget is None and node_budget is None and workers > 1 and not multiprocessing.current_process().daemon:
+        best_score, best_move_pair, nodes, complete = parallel_root_search(search_board, ai_type, search_depth,
+                                                                           player, workers, tt, stop, progress)
+        depth_reached = search_depth if complete else 0
+    elif time_budget is None and node_budget is None and stop is None:
+        report = None
+        if progress is not None:
+            def report(context):
+                progress(search_depth, context.nodes, context.root_best[1] if context.root_best else None)
+        context = SearchContext(tt=tt, root_depth=search_depth, progress=report, stats=stats,
+                                quiescence_nodes=config.get("quiescence", 0))
+        best_score, best_move_pair = search_func(
+            search_board,
+            search_depth,
+            -math.inf,
+            math.inf,
+            True,
+            heuristic,
+            config["moves_func"],
+            player,
+            context
+        )
+        depth_reached = search_depth
+        nodes = context.nodes
+    else:
+        # With only stop set, the search deepens up to search_depth without a budget, so
+        # that moving now plays the deepest completed depth rather than a depth-0 guess
+        # The immediate win/block checks above count against the budget too
+        remaining = time_budget - (time.perf_counter() - start_time) if time_budget is not None else None
+        best_score, best_move_pair, depth_reached, nodes = iterative_deepening(
+            search_board, search_depth, heuristic, config["moves_func"], player, tt, remaining,
+            stop, progress, search_func, node_budget, stats, config.get("quiescence", 0))
+    if best_move_pair is None and depth_reached == 0:
+        # Out of time or told to stop before any pair was scored; take two empty cells, near
+        # the stones if there are any, rather than build a pair list or search the full board
+        cells = search_board.get_candidate_moves()
+        if len(cells) < 2:
+            cells = search_board.get_empty_intersections()
+        best_move_pair = tuple(cells[:2]) if len(cells) >= 2 else None
+
+    end_time = time.perf_counter()
+    time_taken = SearchTime(end_time - start_time, depth_reached, nodes, best_score)
+    logging.info(f"AI Type: {ai_type}, Depth: {depth_reached}/{max_depth}, Nodes: {nodes}, Score: {best_score}, "
+                 f"Move Pair: {best_move_pair}")
+    logging.info(f"Transposition table: {tt.stats()}")
+
+    if best_move_pair is None:
+        empty_spots = board.get_empty_intersections()
+        if len(empty_spots) >= 2:
+            best_score = -float('inf')
+            for i in range(len(empty_spots)):
+                for j in range(i + 1, len(empty_spots)):
+                    move1, move2 = empty_spots[i], empty_spots[j]
+                    temp_board = board.copy()
+                    temp_board.make_move(move1[0], move1[1], player)
+                    temp_board.make_move(move2[0], move2[1], player)
+                    score = config["heuristic"](temp_board, player)
+                    if score > best_score:
+                        best_score = score
+                        best_move_pair = (move1, move2)
+            print("Warning: AI failed to find a move pair; using heuristic-based fallback.")
+            logging.warning("AI failed to find a move pair; using heuristic-based fallback.")
+        else:
+            print("Error: Not enough empty spots for AI to make two moves.")
+            logging.error("Not enough empty spots for AI to make two moves.")
+            return finish(None, time_taken)
+
+    return finish(best_move_pair, time_taken)
+
+
+# --- Background AI Worker ---
+
+def predict_reply(board, ai_type, tt):
+    """
+    Return the human's (PLAYER_1's) most likely reply on board, or None if there is none:
+    the reply the AI's last search expected, if tt still holds it, or else the pair
+    that the configured heuristic scores worst for the AI.
+    """
+    entry = tt.probe(board.hash ^ board.layout.zobrist_turn[PLAYER_1])
+    if entry is not None and entry[4] is not None:
+        (row1, col1), (row2, col2) = entry[4]
+        if board.is_valid_move(row1, col1) and board.is_valid_move(row2, col2) and (row1, col1) != (row2, col2):
+            return entry[4]
+    config = AI_CONFIGS.get(ai_type, AI_CONFIGS[AI_MINIMAX_ALPHA_BETA])
+    search_board = board.copy()
+    search_board.attach_evaluator(config["heuristic"])
+    pairs = order_move_pairs(search_board, PLAYER_1, config["heuristic"], config["moves_func"], PLAYER_2, False,
+                             SearchContext())
+    return next(iter(pairs), None) if pairs is not None else None
+
+
+def ai_worker_loop(requests, results, current_search, reporting):
+    """
+    Body of the AI worker process: run each search request through select_ai_move.
+
+    Requests are (kind, search_id, board, ai_type, depth, time_budget) tuples, or None
+    to exit. A 'search' request searches board for the AI. A 'ponder' request is sent
+    on the human's turn: it predicts the human's reply with predict_reply, posts
+    ('ponder', search_id, reply, hash_after_reply) and searches the position after it.
+
+    A search keeps going while current_search holds its id. It posts
+    ('progress', search_id, depth, nodes, best_pair) updates while reporting holds its
+    id, and ('done', search_id, move_pair, time_taken) at the end. The transposition
+    table is kept from one search to the next, so a ponder search also fills it, and is
+    cleared when the AI type, board size or win length changes.
+    """
+    tt = TranspositionTable()
+    rules = None  # (ai_type, size, win_length) of the scores in tt
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        kind, search_id, board, ai_type, depth, time_budget = request
+        if current_search.value != search_id:
+            continue  # cancelled before it started
+        if (ai_type, board.size, board.win_length) != rules:
+            tt.clear()  # scores of another heuristic or other rules
+            rules = (ai_type, board.size, board.win_length)
+        if kind == 'ponder':
+            reply = predict_reply(board, ai_type, tt)
+            if reply is None:
+                results.put(('ponder', search_id, None, None))
+                continue
+            for row, col in reply:
+                board.make_move(row, col, PLAYER_1)
+            if any(board.check_win(row, col, PLAYER_1)[0] for row, col in reply) or board.is_board_full():
+                results.put(('ponder', search_id, None, None))
+                continue
+            results.put(('ponder', search_id, reply, board.hash))
+
+        def progress(depth, nodes, best_pair, search_id=search_id):
+            if reporting.value == search_id:
+                results.put(('progress', search_id, depth, nodes, best_pair))
+
+        move_pair, time_taken = select_ai_move(board, ai_type, depth, tt=tt, time_budget=time_budget,
+                                               stop=lambda search_id=search_id: current_search.value != search_id,
+                                               progress=progress)
+        results.put(('done', search_id, move_pair, time_taken))
+
+
+class AIWorker:
+    """
+    Runs select_ai_move in a separate process so the caller is never blocked.
+
+    start_search() hands over a position and returns at once; poll() collects the
+    progress updates and the result without waiting. move_now() makes the running
+    search return the best pair found so far; cancel() drops it. The process is
+    spawned rather than forked, so it shares no state with a running Tk window. It is not
+    a daemon, so configs with "workers" > 1 can start their own processes from it, and
+    close() is registered to run at exit.
+
+    start_ponder() uses the human's thinking time: the worker guesses their reply and
+    searches the position after it. If the next start_search() is for that position,
+    the ponder search simply carries on as the real one (its result may already be
+    waiting); otherwise it is cancelled and only its transposition-table entries remain.
+    """
+
+    def __init__(self):
+        context = multiprocessing.get_context('spawn')
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        # Id of the search allowed to run, and of the search whose progress is wanted
+        self.current_search = context.Value('i', 0, lock=False)
+        self.reporting = context.Value('i', 0, lock=False)
+        self.search_id = 0
+        self.ponder_id = None
+        self.ponder_hash = None
+        self.pending = []
+        self.process = context.Process(target=ai_worker_loop,
+                                       args=(self.requests, self.results, self.current_search, self.reporting),
+                                       daemon=False)
+        self.process.start()
+        atexit.register(self.close)
+
+    def _send(self, kind, board, ai_type, depth, time_budget):
+        self.search_id += 1
+        self.pending = []
+        self.current_search.value = self.search_id
+        # The queue pickles the board later, in a feeder thread, and the caller goes on changing its board
+        self.requests.put((kind, self.search_id, board.copy(), ai_type, depth, time_budget))
+        return self.search_id
+
+    def start_search(self, board, ai_type, depth, time_budget=None):
+        """Start searching board for the AI and return the id of the search."""
+        if self.ponder_id is not None:
+            self._collect()
+            pondered = self.ponder_hash == board.hash and self.ponder_id == self.search_id
+            self.ponder_id = None
+            if pondered:
+                logging.info("Ponder hit: the human played the predicted reply")
+                self.reporting.value = self.search_id
+                return self.search_id
+        search_id = self._send('search', board, ai_type, depth, time_budget)
+        self.reporting.value = search_id
+        return search_id
+
+    def start_ponder(self, board, ai_type, depth, time_budget=None):
+        """Start pondering on board, with the human to move."""
+        self.ponder_id = self._send('ponder', board, ai_type, depth, time_budget)
+        self.ponder_hash = None
+
+    def move_now(self):
+        """Make the running search stop and report its best pair so far."""
+        self.current_search.value = 0
+
+    def cancel(self):
+        """Abandon the running search or ponder; poll() will not report it."""
+        self.current_search.value = 0
+        self.search_id += 1
+        self.ponder_id = None
+        self.pending = []
+
+    def _collect(self):
+        """Move the messages of the latest search into pending, noting the ponder prediction."""
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if message[1] != self.search_id:
+                continue
+            if message[0] == 'ponder':
+                self.ponder_hash = message[3]
+            else:
+                self.pending.append(message)
+
+    def poll(self):
+        """Return the messages of the latest search that arrived since the last call, oldest first."""
+        self._collect()
+        messages, self.pending = self.pending, []
+        return messages
+
+    def close(self):
+        """Stop the worker process, terminating it if its search does not stop in time. Does nothing once stopped."""
+        if not self.process.is_alive():
+            return
+        self.cancel()
+        self.requests.put(None)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
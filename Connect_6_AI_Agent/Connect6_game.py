@@ -1,831 +1,39 @@
 import tkinter as tk
 import math
-import time
-import copy
-import random
 import tkinter.messagebox
 import logging
-import pickle
 import os
+import pickle
+import struct
 import pygame
+from Connect6_engine import (AIWorker, AI_HEURISTIC_BLOCK_THREATS, AI_HEURISTIC_OPEN_THREE, AI_HEURISTIC_REDUCTION,
+                             AI_MINIMAX_ALPHA_BETA, AI_MINIMAX_ONLY, AI_MINIMAX_WITH_OPEN_THREE,
+                             AI_MINIMAX_WITH_THREATS, AI_QUIESCENCE, AI_SINGLE_STONE, AI_SYMMETRY_REDUCTION, BOARD_SIZE,
+                             Board, DEFAULT_AI_DEPTH, EMPTY, MAX_AI_DEPTH, PLAYER_1, PLAYER_2, WIN_SEQUENCE)
 
 # --- Constants ---
 
-# Board dimensions
-BOARD_SIZE = 19
-
-# Number of consecutive stones required to win
-WIN_SEQUENCE = 6
-
-# Player values
-EMPTY = 0
-PLAYER_1 = 1  # Human player
-PLAYER_2 = 2  # AI player
+# Board sizes and win lengths offered in the main menu
+MIN_BOARD_SIZE = 7
+MAX_BOARD_SIZE = 25
+MIN_WIN_LENGTH = 4
 
 # GUI drawing parameters
 CELL_SIZE = 30
 BOARD_PADDING = 20
 STONE_RADIUS = CELL_SIZE // 2 - 2
 
-# AI types
-AI_MINIMAX_ONLY = "Minimax Only"
-AI_MINIMAX_ALPHA_BETA = "Minimax + Alpha-Beta"
-AI_HEURISTIC_BLOCK_THREATS = "Heuristic Block Threats "#(Limited Search)
-AI_MINIMAX_WITH_THREATS = "Minimax + Threat Heuristic"
-AI_HEURISTIC_OPEN_THREE = "Heuristic Open Three "#(Limited Search)
-AI_MINIMAX_WITH_OPEN_THREE = "Minimax + Open Three Heuristic"
-AI_HEURISTIC_REDUCTION = "Heuristic Reduction"
-AI_SYMMETRY_REDUCTION = "Symmetry Reduction"
+# How often the GUI polls the background AI for progress and its result (ms)
+AI_POLL_INTERVAL = 50
 
-# Default AI depth
-DEFAULT_AI_DEPTH = 2
-MAX_AI_DEPTH = 4
-
-# Radius for heuristic reduction
-REDUCTION_RADIUS = 3
-
-# Save file
-SAVE_FILE = "connect6_save.pkl"
+# Save file, and the pickled save file of earlier versions, still loaded if there is no other
+SAVE_FILE = "connect6_save.c6s"
+LEGACY_SAVE_FILE = "connect6_save.pkl"
 
 # Logging setup
 logging.basicConfig(filename='ai_moves.log', level=logging.INFO, format='%(asctime)s - %(message)s')
 
 
-# --- Board Class ---
-
-class Board:
-    def __init__(self, size=BOARD_SIZE):
-        """Initialize a board of given size with empty intersections."""
-        self.size = size
-        self.board = [[EMPTY for _ in range(size)] for _ in range(size)]
-
-    def is_valid_move(self, row, col):
-        """Check if a move at (row, col) is valid."""
-        return 0 <= row < self.size and 0 <= col < self.size and self.board[row][col] == EMPTY
-
-    def make_move(self, row, col, player):
-        """Place a player's stone at (row, col) if valid."""
-        if self.is_valid_move(row, col):
-            self.board[row][col] = player
-            return True
-        return False
-
-    def check_win(self, row, col, player):
-        """Check if placing a stone at (row, col) results in a win for player. Return (win, winning_line)."""
-        if self.board[row][col] != player:
-            return False, None
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        for dr, dc in directions:
-            count = 1
-            winning_line = [(row, col)]
-            r, c = row + dr, col + dc
-            while 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == player:
-                count += 1
-                winning_line.append((r, c))
-                r, c = r + dr, c + dc
-            r, c = row - dr, col - dc
-            while 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == player:
-                count += 1
-                winning_line.insert(0, (r, c))
-                r, c = r - dr, c - dc
-            if count >= WIN_SEQUENCE:
-                return True, winning_line
-        return False, None
-
-    def is_board_full(self):
-        """Check if the board has no empty intersections."""
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == EMPTY:
-                    return False
-        return True
-
-    def get_empty_intersections(self):
-        """Return a list of all empty (row, col) intersections."""
-        empty_spots = []
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == EMPTY:
-                    empty_spots.append((r, c))
-        return empty_spots
-
-    def copy(self):
-        """Return a deep copy of the board."""
-        new_board = Board(self.size)
-        new_board.board = copy.deepcopy(self.board)
-        return new_board
-
-    def __str__(self):
-        """Return a string representation of the board."""
-        s = ""
-        for r in range(self.size):
-            s += " ".join([str(x) for x in self.board[r]]) + "\n"
-        return s
-
-
-# --- AI Strategies and Functions ---
-
-def has_winning_move(board, player):
-    """Check if the specified player has an immediate winning move."""
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-    for r in range(board.size):
-        for c in range(board.size):
-            for dr, dc in directions:
-                for offset in range(-WIN_SEQUENCE + 1, 1):
-                    start_r, start_c = r + offset * dr, c + offset * dc
-                    if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                        continue
-                    count = 0
-                    empty_spot = None
-                    for i in range(WIN_SEQUENCE):
-                        curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                        if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                            break
-                        if board.board[curr_r][curr_c] == player:
-                            count += 1
-                        elif board.board[curr_r][curr_c] == EMPTY and (i == 0 or i == WIN_SEQUENCE - 1):
-                            empty_spot = (curr_r, curr_c)
-                    if count == WIN_SEQUENCE - 1 and empty_spot:
-                        return True
-    return False
-
-
-def find_critical_threats(board, player):
-    """Find immediate threats where opponent could win in next move"""
-    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
-    threats = []
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-    for r in range(board.size):
-        for c in range(board.size):
-            for dr, dc in directions:
-                for offset in range(-WIN_SEQUENCE + 1, 1):
-                    start_r, start_c = r + offset * dr, c + offset * dc
-                    if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                        continue
-                    count = 0
-                    empty_spot = None
-                    for i in range(WIN_SEQUENCE):
-                        curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                        if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                            break
-                        if board.board[curr_r][curr_c] == opponent:
-                            count += 1
-                        elif board.board[curr_r][curr_c] == EMPTY and (i == 0 or i == WIN_SEQUENCE - 1):
-                            empty_spot = (curr_r, curr_c)
-                    if count == WIN_SEQUENCE - 1 and empty_spot:
-                        threats.append(empty_spot)
-    return threats
-
-
-def evaluate(board, player):
-    """
-    Evaluate the board state for the given player with improved defensive weights.
-    """
-    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
-    score = 0
-
-    # Adjusted weights with higher penalties for opponent threats
-    player_weights = {1: 1, 2: 10, 3: 100, 4: 5000, 5: 1000000, 6: 10000000}
-    opponent_weights = {1: 1, 2: 20, 3: 500, 4: 20000, 5: 50000000, 6: 10000000}
-
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-
-    for r in range(board.size):
-        for c in range(board.size):
-            if board.board[r][c] == EMPTY:
-                continue
-            current_player = board.board[r][c]
-            current_opponent = PLAYER_1 if current_player == PLAYER_2 else PLAYER_2
-
-            for dr, dc in directions:
-                for offset in range(WIN_SEQUENCE):
-                    start_r, start_c = r - offset * dr, c - offset * dc
-                    if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                        continue
-
-                    player_stones = 0
-                    opponent_stones = 0
-                    line = []
-
-                    for i in range(WIN_SEQUENCE):
-                        curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                        if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                            break
-                        cell_value = board.board[curr_r][curr_c]
-                        line.append(cell_value)
-                        if cell_value == current_player:
-                            player_stones += 1
-                        elif cell_value == current_opponent:
-                            opponent_stones += 1
-
-                    if len(line) == WIN_SEQUENCE:
-                        if opponent_stones == 0:
-                            # Player sequence found
-                            if player_stones == WIN_SEQUENCE:
-                                if current_player == player:
-                                    return 10000000  # Immediate win
-                                else:
-                                    return -10000000  # Immediate loss
-
-                            if player_stones in player_weights:
-                                is_open_start = False
-                                if 0 <= start_r - dr < board.size and 0 <= start_c - dc < board.size:
-                                    if board.board[start_r - dr][start_c - dc] == EMPTY:
-                                        is_open_start = True
-
-                                is_open_end = False
-                                end_r, end_c = start_r + WIN_SEQUENCE * dr, start_c + WIN_SEQUENCE * dc
-                                if 0 <= end_r < board.size and 0 <= end_c < board.size:
-                                    if board.board[end_r][end_c] == EMPTY:
-                                        is_open_end = True
-
-                                line_score = player_weights[player_stones] if current_player == player else - \
-                                opponent_weights[player_stones]
-
-                                if is_open_start and is_open_end:
-                                    line_score *= 2
-                                elif is_open_start or is_open_end:
-                                    line_score *= 1.5
-
-                                score += line_score
-    return score
-
-
-def threat_focused_heuristic(board, player):
-    """
-    Heuristic that prioritizes blocking opponent threats and creating own threats.
-    """
-    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
-
-    # First check for immediate wins/losses
-    if has_winning_move(board, player):
-        return 10000000
-    if has_winning_move(board, opponent):
-        return -10000000
-
-    score = 0
-    weights = {1: 1, 2: 10, 3: 1000, 4: 10000, 5: 150000, 6: 10000000}
-    opponent_weights = {1: 1, 2: 20, 3: 1500, 4: 30000, 5: 200000, 6: 10000000}
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-
-    for r in range(board.size):
-        for c in range(board.size):
-            if board.board[r][c] == EMPTY:
-                continue
-            current_player = board.board[r][c]
-            current_opponent = PLAYER_1 if current_player == PLAYER_2 else PLAYER_2
-
-            for dr, dc in directions:
-                for offset in range(WIN_SEQUENCE):
-                    start_r = r - offset * dr
-                    start_c = c - offset * dc
-
-                    if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                        continue
-
-                    player_stones = 0
-                    opponent_stones = 0
-                    line = []
-
-                    for i in range(WIN_SEQUENCE):
-                        curr_r = start_r + i * dr
-                        curr_c = start_c + i * dc
-                        if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                            break
-                        cell = board.board[curr_r][curr_c]
-                        line.append(cell)
-                        if cell == current_player:
-                            player_stones += 1
-                        elif cell == current_opponent:
-                            opponent_stones += 1
-
-                    if len(line) == WIN_SEQUENCE:
-                        if opponent_stones == 0:
-                            if player_stones == WIN_SEQUENCE:
-                                return 10000000 if current_player == player else -10000000
-
-                            if player_stones in weights:
-                                is_open_start = False
-                                if 0 <= start_r - dr < board.size and 0 <= start_c - dc < board.size:
-                                    if board.board[start_r - dr][start_c - dc] == EMPTY:
-                                        is_open_start = True
-
-                                is_open_end = False
-                                end_r = start_r + WIN_SEQUENCE * dr
-                                end_c = start_c + WIN_SEQUENCE * dc
-                                if 0 <= end_r < board.size and 0 <= end_c < board.size:
-                                    if board.board[end_r][end_c] == EMPTY:
-                                        is_open_end = True
-
-                                line_score = weights[player_stones] if current_player == player else -opponent_weights[
-                                    player_stones]
-                                if is_open_start and is_open_end:
-                                    line_score *= 4
-                                elif is_open_start or is_open_end:
-                                    line_score *= 2
-
-                                score += line_score
-    return score
-
-
-def heuristic_open_three(board, player):
-    """
-    Heuristic that evaluates open three sequences with improved defensive awareness.
-    """
-    opponent = PLAYER_1 if player == PLAYER_2 else PLAYER_2
-
-    # Check for immediate threats first
-    threats = find_critical_threats(board, player)
-    if threats:
-        return -9000000  # Very high penalty for allowing opponent threats
-
-    score = 0
-    weights = {1: 1, 2: 10, 3: 1000, 4: 5000, 5: 30000000, 6: 10000000}
-    opponent_weights = {1: 1, 2: 15, 3: 1500, 4: 10000, 5: 50000000, 6: 10000000}
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-
-    for r in range(board.size):
-        for c in range(board.size):
-            if board.board[r][c] == EMPTY:
-                continue
-            current_player = board.board[r][c]
-            current_opponent = PLAYER_1 if current_player == PLAYER_2 else PLAYER_2
-            for dr, dc in directions:
-                for offset in range(WIN_SEQUENCE):
-                    start_r, start_c = r - offset * dr, c - offset * dc
-                    if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                        continue
-                    player_stones = 0
-                    opponent_stones = 0
-                    line = []
-                    for i in range(WIN_SEQUENCE):
-                        curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                        if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                            break
-                        cell_value = board.board[curr_r][curr_c]
-                        line.append(cell_value)
-                        if cell_value == current_player:
-                            player_stones += 1
-                        elif cell_value == current_opponent:
-                            opponent_stones += 1
-                    if len(line) == WIN_SEQUENCE:
-                        if opponent_stones == 0:
-                            if player_stones == WIN_SEQUENCE:
-                                if current_player == player:
-                                    return 10000000
-                                else:
-                                    return -10000000
-                            if player_stones in weights:
-                                is_open_start = False
-                                if 0 <= start_r - dr < board.size and 0 <= start_c - dc < board.size:
-                                    if board.board[start_r - dr][start_c - dc] == EMPTY:
-                                        is_open_start = True
-                                is_open_end = False
-                                end_r, end_c = start_r + WIN_SEQUENCE * dr, start_c + WIN_SEQUENCE * dc
-                                if 0 <= end_r < board.size and 0 <= end_c < board.size:
-                                    if board.board[end_r][end_c] == EMPTY:
-                                        is_open_end = True
-                                line_score = weights[player_stones] if current_player == player else -opponent_weights[
-                                    player_stones]
-                                if is_open_start and is_open_end:
-                                    if player_stones == 3:
-                                        line_score *= 5
-                                    else:
-                                        line_score *= 2
-                                elif is_open_start or is_open_end:
-                                    if player_stones == 3:
-                                        line_score *= 3
-                                    else:
-                                        line_score *= 1.5
-                                score += line_score
-    return score
-
-
-def alphabeta(board, depth, alpha, beta, is_maximizing_player, heuristic_func, get_moves_func, original_player):
-    """
-    Implement alpha-beta pruning with improved threat detection.
-    """
-    if depth == 0 or board.is_board_full():
-        return heuristic_func(board, original_player), None
-
-    # Check for immediate threats at the start of each node evaluation
-    if is_maximizing_player:
-        threats = find_critical_threats(board, original_player)
-        if threats:
-            # If we're maximizing and find opponent threats, prioritize blocking
-            blocking_move = threats[0]
-            empty_spots = board.get_empty_intersections()
-            empty_spots.remove(blocking_move)
-            if empty_spots:
-                second_move = random.choice(empty_spots)
-                return float('inf'), (blocking_move, second_move)
-
-    possible_moves_pairs = get_moves_func(board)
-    if not possible_moves_pairs:
-        return heuristic_func(board, original_player), None
-
-    def score_move_pair(move1, move2):
-        temp_board = board.copy()
-        temp_board.make_move(move1[0], move1[1], original_player if is_maximizing_player else (
-            PLAYER_1 if original_player == PLAYER_2 else PLAYER_2))
-        temp_board.make_move(move2[0], move2[1], original_player if is_maximizing_player else (
-            PLAYER_1 if original_player == PLAYER_2 else PLAYER_2))
-        return heuristic_func(temp_board, original_player)
-
-    possible_moves_pairs.sort(key=lambda p: score_move_pair(p[0], p[1]), reverse=is_maximizing_player)
-    best_move_pair = None
-
-    if is_maximizing_player:
-        max_eval = -math.inf
-        current_player = original_player
-        for move1, move2 in possible_moves_pairs:
-            temp_board1 = board.copy()
-            if not temp_board1.make_move(move1[0], move1[1], current_player):
-                continue
-            if temp_board1.check_win(move1[0], move1[1], current_player)[0]:
-                eval = 10000000
-            else:
-                temp_board2 = temp_board1.copy()
-                if not temp_board2.is_valid_move(move2[0], move2[1]):
-                    continue
-                if not temp_board2.make_move(move2[0], move2[1], current_player):
-                    continue
-                if temp_board2.check_win(move2[0], move2[1], current_player)[0]:
-                    eval = 10000000
-                else:
-                    eval, _ = alphabeta(temp_board2, depth - 1, alpha, beta, False, heuristic_func, get_moves_func,
-                                        original_player)
-            if eval > max_eval:
-                max_eval = eval
-                best_move_pair = (move1, move2)
-            alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-        return max_eval, best_move_pair
-    else:
-        min_eval = math.inf
-        current_player = PLAYER_1 if original_player == PLAYER_2 else PLAYER_2
-        for move1, move2 in possible_moves_pairs:
-            temp_board1 = board.copy()
-            if not temp_board1.make_move(move1[0], move1[1], current_player):
-                continue
-            if temp_board1.check_win(move1[0], move1[1], current_player)[0]:
-                eval = -10000000
-            else:
-                temp_board2 = temp_board1.copy()
-                if not temp_board2.is_valid_move(move2[0], move2[1]):
-                    continue
-                if not temp_board2.make_move(move2[0], move2[1], current_player):
-                    continue
-                if temp_board2.check_win(move2[0], move2[1], current_player)[0]:
-                    eval = -10000000
-                else:
-                    eval, _ = alphabeta(temp_board2, depth - 1, alpha, beta, True, heuristic_func, get_moves_func,
-                                        original_player)
-            if eval < min_eval:
-                min_eval = eval
-                best_move_pair = (move1, move2)
-            beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return min_eval, best_move_pair
-
-
-# --- Move Generation Functions ---
-
-def get_all_possible_pairs(board):
-    """Generate all possible pairs of empty intersections on the board."""
-    empty_spots = board.get_empty_intersections()
-    possible_pairs = []
-    for i in range(len(empty_spots)):
-        for j in range(i + 1, len(empty_spots)):
-            possible_pairs.append((empty_spots[i], empty_spots[j]))
-    return possible_pairs
-
-
-def get_reduced_moves_pairs(board):
-    """
-    Generate move pairs from empty intersections near occupied spots,
-    reducing the search space but including critical threats.
-    """
-    empty_spots = board.get_empty_intersections()
-    occupied_spots = [(r, c) for r in range(board.size) for c in range(board.size) if board.board[r][c] != EMPTY]
-
-    # Always include spots that are part of critical threats
-    critical_threats = find_critical_threats(board, PLAYER_2)
-    nearby_empty_spots = set(critical_threats)
-
-    for er, ec in empty_spots:
-        for or_, oc in occupied_spots:
-            distance = abs(er - or_) + abs(ec - oc)
-            if distance <= REDUCTION_RADIUS:
-                nearby_empty_spots.add((er, ec))
-                break
-
-    if not occupied_spots:
-        center = board.size // 2
-        for r in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
-            for c in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
-                if board.board[r][c] == EMPTY:
-                    nearby_empty_spots.add((r, c))
-
-    nearby_empty_list = list(nearby_empty_spots)
-    possible_pairs = []
-    for i in range(len(nearby_empty_list)):
-        for j in range(i + 1, len(nearby_empty_list)):
-            possible_pairs.append((nearby_empty_list[i], nearby_empty_list[j]))
-    return possible_pairs
-
-
-def get_symmetry_reduced_pairs(board, heuristic_func=evaluate, player=PLAYER_2):
-    """
-    Generate move pairs considering board symmetries, with priority to threat blocks.
-    """
-    # Check for immediate threats first
-    threats = find_critical_threats(board, player)
-    if threats:
-        blocking_move = threats[0]
-        empty_spots = board.get_empty_intersections()
-        empty_spots.remove(blocking_move)
-        if empty_spots:
-            second_move = random.choice(empty_spots)
-            return [(blocking_move, second_move)]
-
-    # Proceed with symmetry reduction if no immediate threats
-    empty_spots = board.get_empty_intersections()
-    occupied_spots = [(r, c) for r in range(board.size) for c in range(board.size) if board.board[r][c] != EMPTY]
-    nearby_empty_spots = set()
-
-    for er, ec in empty_spots:
-        for or_, oc in occupied_spots:
-            if abs(er - or_) + abs(ec - oc) <= REDUCTION_RADIUS:
-                nearby_empty_spots.add((er, ec))
-                break
-
-    if not occupied_spots:
-        center = board.size // 2
-        for r in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
-            for c in range(max(0, center - REDUCTION_RADIUS), min(board.size, center + REDUCTION_RADIUS + 1)):
-                if board.board[r][c] == EMPTY:
-                    nearby_empty_spots.add((r, c))
-
-    empty_spots = list(nearby_empty_spots)
-    symmetry_groups = {}
-
-    for i in range(len(empty_spots)):
-        for j in range(i + 1, len(empty_spots)):
-            move1, move2 = empty_spots[i], empty_spots[j]
-            symmetric_pairs = [
-                ((move1[0], move1[1]), (move2[0], move2[1])),  # Original
-                ((move1[1], board.size - 1 - move1[0]), (move2[1], board.size - 1 - move2[0])),  # 90° rotation
-                ((board.size - 1 - move1[0], board.size - 1 - move1[1]),
-                 (board.size - 1 - move2[0], board.size - 1 - move2[1])),  # 180° rotation
-                ((board.size - 1 - move1[1], move1[0]), (board.size - 1 - move2[1], move2[0])),  # 270° rotation
-                ((move1[0], board.size - 1 - move1[1]), (move2[0], board.size - 1 - move2[1])),  # Horizontal reflection
-                ((board.size - 1 - move1[0], move1[1]), (board.size - 1 - move2[0], move2[1])),  # Vertical reflection
-                ((move1[1], move1[0]), (move2[1], move2[0])),  # Main diagonal reflection
-                ((board.size - 1 - move1[1], board.size - 1 - move1[0]),
-                 (board.size - 1 - move2[1], board.size - 1 - move2[0]))  # Anti-diagonal reflection
-            ]
-            valid_pairs = [
-                (p1, p2) for p1, p2 in symmetric_pairs
-                if (0 <= p1[0] < board.size and 0 <= p1[1] < board.size and
-                    0 <= p2[0] < board.size and 0 <= p2[1] < board.size and
-                    board.board[p1[0]][p1[1]] == EMPTY and board.board[p2[0]][p2[1]] == EMPTY)
-            ]
-            if not valid_pairs:
-                continue
-
-            best_pair = None
-            best_score = -float('inf')
-            for p1, p2 in valid_pairs:
-                temp_board = board.copy()
-                temp_board.make_move(p1[0], p1[1], player)
-                temp_board.make_move(p2[0], p2[1], player)
-                if temp_board.check_win(p1[0], p1[1], player)[0] or temp_board.check_win(p2[0], p2[1], player)[0]:
-                    return [(p1, p2)]  # Immediate win found
-                score = heuristic_func(temp_board, player)
-                if score > best_score:
-                    best_score = score
-                    best_pair = (p1, p2)
-
-            if best_pair:
-                canonical_pair = (
-                    (min(best_pair[0][0], best_pair[1][0]), min(best_pair[0][1], best_pair[1][1])),
-                    (max(best_pair[0][0], best_pair[1][0]), max(best_pair[0][1], best_pair[1][1]))
-                )  # Added missing parenthesis
-                symmetry_groups[canonical_pair] = (move1, move2)
-
-    return list(symmetry_groups.values())
-# --- AI Selection and Execution ---
-
-AI_CONFIGS = {
-    AI_MINIMAX_ONLY: {
-        "heuristic": evaluate,
-        "moves_func": get_all_possible_pairs,
-        "depth": lambda x: x
-    },
-    AI_MINIMAX_ALPHA_BETA: {
-        "heuristic": evaluate,
-        "moves_func": get_all_possible_pairs,
-        "depth": lambda x: x
-    },
-    AI_HEURISTIC_BLOCK_THREATS: {
-        "heuristic": threat_focused_heuristic,
-        "moves_func": get_reduced_moves_pairs,
-        "depth": lambda x: min(x, 2)
-    },
-    AI_MINIMAX_WITH_THREATS: {
-        "heuristic": threat_focused_heuristic,
-        "moves_func": get_reduced_moves_pairs,
-        "depth": lambda x: x
-    },
-    AI_HEURISTIC_OPEN_THREE: {
-        "heuristic": heuristic_open_three,
-        "moves_func": get_reduced_moves_pairs,
-        "depth": lambda x: min(x, 2)
-    },
-    AI_MINIMAX_WITH_OPEN_THREE: {
-        "heuristic": heuristic_open_three,
-        "moves_func": get_reduced_moves_pairs,
-        "depth": lambda x: x
-    },
-    AI_HEURISTIC_REDUCTION: {
-        "heuristic": evaluate,
-        "moves_func": get_reduced_moves_pairs,
-        "depth": lambda x: x
-    },
-    AI_SYMMETRY_REDUCTION: {
-        "heuristic": evaluate,
-        "moves_func": lambda b: get_symmetry_reduced_pairs(b, evaluate, PLAYER_2),
-        "depth": lambda x: x
-    }
-}
-
-
-def select_ai_move(board, ai_type, max_depth):
-    """
-    Select the best move pair for the AI with improved defensive play.
-    """
-    start_time = time.perf_counter()
-    config = AI_CONFIGS.get(ai_type, AI_CONFIGS[AI_MINIMAX_ALPHA_BETA])
-
-    # First check if AI can win immediately
-    def find_immediate_wins():
-        winning_pairs = []
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        empty_spots = board.get_empty_intersections()
-
-        # Single-move wins
-        for r in range(board.size):
-            for c in range(board.size):
-                for dr, dc in directions:
-                    for offset in range(-WIN_SEQUENCE + 1, 1):
-                        start_r, start_c = r + offset * dr, c + offset * dc
-                        if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                            continue
-                        count = 0
-                        empty_spot = None
-                        for i in range(WIN_SEQUENCE):
-                            curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                            if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                                break
-                            if board.board[curr_r][curr_c] == PLAYER_2:
-                                count += 1
-                            elif board.board[curr_r][curr_c] == EMPTY and (i == 0 or i == WIN_SEQUENCE - 1):
-                                empty_spot = (curr_r, curr_c)
-                        if count == WIN_SEQUENCE - 1 and empty_spot and empty_spot in empty_spots:
-                            temp_board = board.copy()
-                            temp_board.make_move(empty_spot[0], empty_spot[1], PLAYER_2)
-                            if temp_board.check_win(empty_spot[0], empty_spot[1], PLAYER_2)[0]:
-                                second_spots = [s for s in empty_spots if s != empty_spot]
-                                if second_spots:
-                                    second_move = random.choice(second_spots)
-                                    winning_pairs.append((empty_spot, second_move))
-                                    logging.info(f"Single-move win found at {empty_spot}, second move {second_move}")
-
-        # Two-move wins
-        for r in range(board.size):
-            for c in range(board.size):
-                for dr, dc in directions:
-                    for offset in range(-WIN_SEQUENCE + 1, 2):
-                        start_r, start_c = r + offset * dr, c + offset * dc
-                        if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                            continue
-                        count = 0
-                        empty_spots_in_line = []
-                        for i in range(WIN_SEQUENCE):
-                            curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                            if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                                break
-                            if board.board[curr_r][curr_c] == PLAYER_2:
-                                count += 1
-                            elif board.board[curr_r][curr_c] == EMPTY:
-                                empty_spots_in_line.append((curr_r, curr_c))
-                        if count == WIN_SEQUENCE - 2 and len(empty_spots_in_line) == 2:
-                            move1, move2 = empty_spots_in_line
-                            if move1 in empty_spots and move2 in empty_spots:
-                                temp_board = board.copy()
-                                temp_board.make_move(move1[0], move1[1], PLAYER_2)
-                                temp_board.make_move(move2[0], move2[1], PLAYER_2)
-                                if (temp_board.check_win(move1[0], move1[1], PLAYER_2)[0] or
-                                        temp_board.check_win(move2[0], move2[1], PLAYER_2)[0]):
-                                    winning_pairs.append((move1, move2))
-                                    logging.info(f"Two-move win found at {move1}, {move2}")
-
-        return winning_pairs
-
-    # Check for critical threats that must be blocked
-    def find_critical_blocks():
-        blocks = []
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        empty_spots = board.get_empty_intersections()
-
-        for r in range(board.size):
-            for c in range(board.size):
-                for dr, dc in directions:
-                    for offset in range(-WIN_SEQUENCE + 1, 1):
-                        start_r, start_c = r + offset * dr, c + offset * dc
-                        if not (0 <= start_r < board.size and 0 <= start_c < board.size):
-                            continue
-                        count = 0
-                        empty_spot = None
-                        for i in range(WIN_SEQUENCE):
-                            curr_r, curr_c = start_r + i * dr, start_c + i * dc
-                            if not (0 <= curr_r < board.size and 0 <= curr_c < board.size):
-                                break
-                            if board.board[curr_r][curr_c] == PLAYER_1:
-                                count += 1
-                            elif board.board[curr_r][curr_c] == EMPTY and (i == 0 or i == WIN_SEQUENCE - 1):
-                                empty_spot = (curr_r, curr_c)
-                        if count == WIN_SEQUENCE - 1 and empty_spot and empty_spot in empty_spots:
-                            temp_board = board.copy()
-                            temp_board.make_move(empty_spot[0], empty_spot[1], PLAYER_1)
-                            if temp_board.check_win(empty_spot[0], empty_spot[1], PLAYER_1)[0]:
-                                blocks.append(empty_spot)
-                                logging.info(f"Critical block needed at {empty_spot}")
-
-        return blocks
-
-    # Use immediate win if found
-    immediate_wins = find_immediate_wins()
-    if immediate_wins:
-        selected_pair = random.choice(immediate_wins)
-        end_time = time.perf_counter()
-        return selected_pair, end_time - start_time
-
-    # Block critical threats first
-    critical_blocks = find_critical_blocks()
-    if critical_blocks:
-        blocking_move = critical_blocks[0]
-        empty_spots = board.get_empty_intersections()
-        empty_spots.remove(blocking_move)
-        if empty_spots:
-            second_move = random.choice(empty_spots)
-            end_time = time.perf_counter()
-            logging.info(f"Blocking critical threat at {blocking_move} with second move at {second_move}")
-            return (blocking_move, second_move), end_time - start_time
-
-    # Otherwise, use the configured AI strategy
-    best_score, best_move_pair = alphabeta(
-        board.copy(),
-        config["depth"](max_depth),
-        -math.inf,
-        math.inf,
-        True,
-        config["heuristic"],
-        config["moves_func"],
-        PLAYER_2
-    )
-
-    end_time = time.perf_counter()
-    time_taken = end_time - start_time
-    logging.info(f"AI Type: {ai_type}, Depth: {max_depth}, Score: {best_score}, Move Pair: {best_move_pair}")
-
-    if best_move_pair is None:
-        empty_spots = board.get_empty_intersections()
-        if len(empty_spots) >= 2:
-            best_score = -float('inf')
-            for i in range(len(empty_spots)):
-                for j in range(i + 1, len(empty_spots)):
-                    move1, move2 = empty_spots[i], empty_spots[j]
-                    temp_board = board.copy()
-                    temp_board.make_move(move1[0], move1[1], PLAYER_2)
-                    temp_board.make_move(move2[0], move2[1], PLAYER_2)
-                    score = config["heuristic"](temp_board, PLAYER_2)
-                    if score > best_score:
-                        best_score = score
-                        best_move_pair = (move1, move2)
-            print("Warning: AI failed to find a move pair; using heuristic-based fallback.")
-            logging.warning("AI failed to find a move pair; using heuristic-based fallback.")
-        else:
-            print("Error: Not enough empty spots for AI to make two moves.")
-            logging.error("Not enough empty spots for AI to make two moves.")
-            return None, time_taken
-
-    return best_move_pair, time_taken
-
-
 # --- GUI Class ---
 
 class GameGUI:
@@ -841,8 +49,17 @@ class GameGUI:
         self.undo_button = None
         self.save_button = None
         self.load_button = None
+        self.move_now_button = None
+        # (row, col) -> (canvas item, player) of every stone on the canvas, and the winning
+        # line its overlay shows, so that draw_stones only touches what changed
+        self.stone_items = {}
+        self.drawn_winning_line = None
         self.ai_option_var = tk.StringVar(value=AI_MINIMAX_ALPHA_BETA)
         self.ai_depth_var = tk.StringVar(value=str(DEFAULT_AI_DEPTH))
+        self.ai_time_var = tk.StringVar(value="")
+        self.ai_ponder_var = tk.BooleanVar(value=False)
+        self.board_size_var = tk.StringVar(value=str(BOARD_SIZE))
+        self.win_length_var = tk.StringVar(value=str(WIN_SEQUENCE))
         self.ai_options = [
             AI_MINIMAX_ONLY,
             AI_MINIMAX_ALPHA_BETA,
@@ -851,7 +68,9 @@ class GameGUI:
             AI_HEURISTIC_OPEN_THREE,
             AI_MINIMAX_WITH_OPEN_THREE,
             AI_HEURISTIC_REDUCTION,
-            AI_SYMMETRY_REDUCTION
+            AI_SYMMETRY_REDUCTION,
+            AI_SINGLE_STONE,
+            AI_QUIESCENCE
         ]
         self.create_widgets()
 
@@ -865,12 +84,23 @@ class GameGUI:
         tk.Label(self.menu_frame, text="AI Search Depth (1–4, >2 is slow on 19x19):", font=('Arial', 14, 'bold')).pack(
             pady=15)
         tk.Entry(self.menu_frame, textvariable=self.ai_depth_var, width=5, font=('Arial', 12)).pack(pady=5)
+        tk.Label(self.menu_frame, text="AI Time per Move in seconds (blank = fixed depth):",
+                 font=('Arial', 14, 'bold')).pack(pady=15)
+        tk.Entry(self.menu_frame, textvariable=self.ai_time_var, width=5, font=('Arial', 12)).pack(pady=5)
+        tk.Checkbutton(self.menu_frame, text="AI ponders on your time", variable=self.ai_ponder_var,
+                       font=('Arial', 12)).pack(pady=5)
+        tk.Label(self.menu_frame, text=f"Board Size ({MIN_BOARD_SIZE}–{MAX_BOARD_SIZE}) and Stones in a Row to Win:",
+                 font=('Arial', 14, 'bold')).pack(pady=15)
+        size_frame = tk.Frame(self.menu_frame)
+        tk.Entry(size_frame, textvariable=self.board_size_var, width=5, font=('Arial', 12)).pack(side='left', padx=5)
+        tk.Entry(size_frame, textvariable=self.win_length_var, width=5, font=('Arial', 12)).pack(side='left', padx=5)
+        size_frame.pack(pady=5)
         tk.Button(self.menu_frame, text="Start Game", command=self.start_game_from_menu, font=('Arial', 14, 'bold'),
                   bg='green', fg='white').pack(pady=10)
         tk.Button(self.menu_frame, text="Load Saved Game", command=self.game_manager.load_game,
                   font=('Arial', 14, 'bold'), bg='blue', fg='white').pack(pady=10)
         self.game_frame = tk.Frame(self.root)
-        canvas_size = (BOARD_SIZE - 1) * CELL_SIZE + 2 * BOARD_PADDING
+        canvas_size = self.get_board_pixel_size(BOARD_SIZE)
         self.canvas = tk.Canvas(self.game_frame, width=canvas_size, height=canvas_size, bg='burlywood')
         self.canvas.pack(pady=BOARD_PADDING)
         self.canvas.bind("<Button-1>", self.canvas_click)
@@ -878,6 +108,8 @@ class GameGUI:
         self.status_label.pack(pady=5)
         self.timer_label = tk.Label(self.game_frame, text="AI time: 0.000000 seconds", font=('Arial', 12))
         self.timer_label.pack(pady=5)
+        self.move_now_button = tk.Button(self.game_frame, text="Move Now", command=self.game_manager.move_now,
+                                         font=('Arial', 12), bg='red', fg='white')
         self.undo_button = tk.Button(self.game_frame, text="Undo", command=self.game_manager.undo_move,
                                      font=('Arial', 12), bg='orange', fg='white', state='disabled')
         self.undo_button.pack(pady=5)
@@ -915,27 +147,67 @@ class GameGUI:
             tk.messagebox.showwarning("Invalid Input",
                                       f"Invalid depth input: {selected_ai_depth_str}. Using default depth {DEFAULT_AI_DEPTH}.")
             print(f"Invalid depth input: {selected_ai_depth_str}. Using default depth {DEFAULT_AI_DEPTH}")
+        selected_ai_time_str = self.ai_time_var.get().strip()
+        selected_ai_time = None
+        if selected_ai_time_str:
+            try:
+                selected_ai_time = float(selected_ai_time_str)
+                if selected_ai_time <= 0:
+                    raise ValueError
+            except ValueError:
+                selected_ai_time = None
+                tk.messagebox.showwarning("Invalid Input",
+                                          f"Invalid time input: {selected_ai_time_str}. Using fixed depth search.")
+                print(f"Invalid time input: {selected_ai_time_str}. Using fixed depth search")
+        board_size = self.read_int_setting(self.board_size_var, "board size", BOARD_SIZE, MIN_BOARD_SIZE,
+                                           MAX_BOARD_SIZE)
+        win_length = self.read_int_setting(self.win_length_var, "win length", min(WIN_SEQUENCE, board_size),
+                                           MIN_WIN_LENGTH, board_size)
         self.menu_frame.pack_forget()
         self.game_frame.pack(expand=True, fill='both')
-        self.game_manager.start_new_game(selected_ai_type, selected_ai_depth)
+        self.game_manager.start_new_game(selected_ai_type, selected_ai_depth, selected_ai_time,
+                                         self.ai_ponder_var.get(), board_size, win_length)
 
-    def get_board_pixel_size(self):
-        """Return the pixel size of the board."""
-        return (BOARD_SIZE - 1) * CELL_SIZE + 2 * BOARD_PADDING
+    def read_int_setting(self, var, name, default, low, high):
+        """Return the integer in var clamped to [low, high], or default if it is not a number, warning on changes."""
+        text = var.get().strip()
+        try:
+            value = int(text)
+        except ValueError:
+            tk.messagebox.showwarning("Invalid Input", f"Invalid {name} input: {text}. Using {default}.")
+            print(f"Invalid {name} input: {text}. Using {default}")
+            return default
+        if not low <= value <= high:
+            value = min(max(value, low), high)
+            tk.messagebox.showwarning("Invalid Input",
+                                      f"The {name} must be between {low} and {high}. Using {value}.")
+        return value
+
+    def get_board_pixel_size(self, size=None):
+        """Return the pixel size of a board of the given size, by default the current game's."""
+        if size is None:
+            size = self.game_manager.board.size
+        return (size - 1) * CELL_SIZE + 2 * BOARD_PADDING
 
     def draw_board(self):
-        """Draw the game board with grid lines and star points."""
+        """Draw the game board with grid lines and star points, resizing the canvas to the board."""
         self.canvas.delete("all")
+        self.stone_items = {}
+        self.drawn_winning_line = None
+        size = self.game_manager.board.size
         board_pixel_size = self.get_board_pixel_size()
-        for i in range(BOARD_SIZE):
+        self.canvas.config(width=board_pixel_size, height=board_pixel_size)
+        for i in range(size):
             y = BOARD_PADDING + i * CELL_SIZE
             self.canvas.create_line(BOARD_PADDING, y, board_pixel_size - BOARD_PADDING, y, fill='black')
-        for i in range(BOARD_SIZE):
+        for i in range(size):
             x = BOARD_PADDING + i * CELL_SIZE
             self.canvas.create_line(x, BOARD_PADDING, x, board_pixel_size - BOARD_PADDING, fill='black')
         star_points = []
-        if BOARD_SIZE == 19:
-            star_points = [(3, 3), (3, 9), (3, 15), (9, 3), (9, 9), (9, 15), (15, 3), (15, 9), (15, 15)]
+        if size >= 13 and size % 2 == 1:
+            # Corner points 4 lines in from the edges, the center and the edge midpoints
+            lines = (3, size // 2, size - 4)
+            star_points = [(r, c) for r in lines for c in lines]
         for r, c in star_points:
             x = BOARD_PADDING + c * CELL_SIZE
             y = BOARD_PADDING + r * CELL_SIZE
@@ -943,23 +215,54 @@ class GameGUI:
             self.canvas.create_oval(x - star_radius, y - star_radius, x + star_radius, y + star_radius, fill='black')
 
     def draw_stones(self, board_state, winning_line=None):
-        """Draw all stones and highlight the winning line if provided."""
-        self.canvas.delete("stone")
+        """
+        Bring the stones on the canvas in line with board_state and highlight the winning
+        line if provided. Only the stones that changed since the last call are created,
+        recoloured or deleted; the winning line is an overlay redrawn only when it changes.
+        """
+        created = False
+        for r, row in enumerate(board_state):
+            for c, player in enumerate(row):
+                drawn = self.stone_items.get((r, c))
+                if drawn is None:
+                    if player != EMPTY:
+                        created = True
+                        x = BOARD_PADDING + c * CELL_SIZE
+                        y = BOARD_PADDING + r * CELL_SIZE
+                        color, outline = self.stone_colors(player)
+                        item = self.canvas.create_oval(x - STONE_RADIUS, y - STONE_RADIUS,
+                                                       x + STONE_RADIUS, y + STONE_RADIUS,
+                                                       fill=color, outline=outline, tags="stone")
+                        self.stone_items[r, c] = (item, player)
+                elif player == EMPTY:
+                    self.canvas.delete(drawn[0])
+                    del self.stone_items[r, c]
+                elif player != drawn[1]:
+                    color, outline = self.stone_colors(player)
+                    self.canvas.itemconfig(drawn[0], fill=color, outline=outline)
+                    self.stone_items[r, c] = (drawn[0], player)
+        if winning_line != self.drawn_winning_line:
+            self.draw_winning_line(winning_line)
+        elif created and winning_line:
+            self.canvas.tag_raise("win_line")  # keep the overlay above stones drawn after it
+
+    @staticmethod
+    def stone_colors(player):
+        """Return the (fill, outline) colours of a stone of player."""
+        return ('black', 'white') if player == PLAYER_1 else ('white', 'black')
+
+    def draw_winning_line(self, winning_line):
+        """Replace the winning-line overlay: a red ring on each winning stone and a line through them."""
         self.canvas.delete("win_line")
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                player = board_state[r][c]
-                if player != EMPTY:
-                    x = BOARD_PADDING + c * CELL_SIZE
-                    y = BOARD_PADDING + r * CELL_SIZE
-                    color = 'black' if player == PLAYER_1 else 'white'
-                    outline = 'black' if player == PLAYER_2 else 'white'
-                    if winning_line and (r, c) in winning_line:
-                        outline = 'red'  # Highlight winning stones
-                    self.canvas.create_oval(x - STONE_RADIUS, y - STONE_RADIUS,
-                                            x + STONE_RADIUS, y + STONE_RADIUS,
-                                            fill=color, outline=outline, tags="stone")
-        if winning_line and len(winning_line) >= WIN_SEQUENCE:
+        self.drawn_winning_line = winning_line
+        if not winning_line:
+            return
+        for r, c in winning_line:
+            x = BOARD_PADDING + c * CELL_SIZE
+            y = BOARD_PADDING + r * CELL_SIZE
+            self.canvas.create_oval(x - STONE_RADIUS, y - STONE_RADIUS, x + STONE_RADIUS, y + STONE_RADIUS,
+                                    outline='red', tags="win_line")  # Highlight winning stones
+        if len(winning_line) >= self.game_manager.board.win_length:
             start_r, start_c = winning_line[0]
             end_r, end_c = winning_line[-1]
             start_x = BOARD_PADDING + start_c * CELL_SIZE
@@ -972,7 +275,8 @@ class GameGUI:
         """Handle mouse clicks on the canvas to place stones."""
         col = int((event.x - BOARD_PADDING) / CELL_SIZE + 0.5)
         row = int((event.y - BOARD_PADDING) / CELL_SIZE + 0.5)
-        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
+        size = self.game_manager.board.size
+        if 0 <= row < size and 0 <= col < size:
             x_check = BOARD_PADDING + col * CELL_SIZE
             y_check = BOARD_PADDING + row * CELL_SIZE
             distance = math.dist((event.x, event.y), (x_check, y_check))
@@ -992,8 +296,26 @@ class GameGUI:
         self.root.update_idletasks()
 
     def display_timer(self, time_taken):
-        """Display the time taken for the AI's move."""
-        self.timer_label.config(text=f"AI time: {time_taken:.6f} seconds")
+        """Display the time taken for the AI's move, with the depth and nodes searched when known."""
+        text = f"AI time: {time_taken:.6f} seconds"
+        if getattr(time_taken, 'nodes', 0):
+            text += f" (depth {time_taken.depth}, {time_taken.nodes} nodes)"
+        self.timer_label.config(text=text)
+
+    def display_progress(self, depth, nodes, best_pair):
+        """Display the AI's search progress while it is thinking."""
+        text = f"AI thinking: depth {depth}, {nodes} nodes"
+        if best_pair is not None:
+            text += f", best so far {best_pair[0]} {best_pair[1]}"
+        self.timer_label.config(text=text)
+
+    def show_move_now(self, visible):
+        """Show or hide the Move Now button next to the AI timer."""
+        if visible:
+            self.move_now_button.config(state='normal')
+            self.move_now_button.pack(pady=5, after=self.timer_label)
+        else:
+            self.move_now_button.pack_forget()
 
     def disable_input(self):
         """Disable canvas input and buttons during AI moves."""
@@ -1017,6 +339,98 @@ class GameGUI:
         self.menu_button.pack(pady=10)
 
 
+# --- Save Files ---
+
+# A save file is a header, the AI type, the move list as (row, col, player) and the undo
+# history as move counts plus turn state. Loading replays the moves, which rebuilds the
+# board's masks, hash and indexes along the way.
+SAVE_MAGIC = b"C6SAVE03"
+# magic, board size, win length, current player, flags, AI depth, AI time budget (NaN for
+# none), AI type length, move count, moves of the current turn, undo entries
+SAVE_HEADER = struct.Struct("<8sBBBBBdHIBH")
+SAVE_MOVE = struct.Struct("<BBB")
+# move count, current player, flags, moves of the current turn
+SAVE_UNDO = struct.Struct("<IBBB")
+SAVE_FIRST_MOVE, SAVE_GAME_OVER, SAVE_PONDER = 1, 2, 4
+
+
+def turn_flags(state):
+    """Pack the player1_first_move, game_over and ai_ponder entries of state into flag bits."""
+    return ((SAVE_FIRST_MOVE if state['player1_first_move'] else 0) | (SAVE_GAME_OVER if state['game_over'] else 0)
+            | (SAVE_PONDER if state.get('ai_ponder') else 0))
+
+
+def pack_save(board, state, history):
+    """
+    Return the save file bytes for board and the game state dict state (current_player,
+    ai_type, ai_depth, ai_time_budget, ai_ponder, player1_first_move, current_turn_moves,
+    game_over). history is GameManager's undo stack: dicts of the same turn entries
+    plus 'moves', the length of board.move_stack when the entry was saved.
+    """
+    ai_type = state['ai_type'].encode('utf-8')
+    time_budget = math.nan if state['ai_time_budget'] is None else state['ai_time_budget']
+    moves = board.move_stack
+    parts = [SAVE_HEADER.pack(SAVE_MAGIC, board.size, board.win_length, state['current_player'], turn_flags(state),
+                              state['ai_depth'], time_budget, len(ai_type), len(moves),
+                              len(state['current_turn_moves']), len(history)), ai_type]
+    parts.extend(SAVE_MOVE.pack(r, c, board.board[r][c]) for r, c in moves)
+    parts.extend(SAVE_UNDO.pack(entry['moves'], entry['current_player'], turn_flags(entry),
+                                len(entry['current_turn_moves'])) for entry in history)
+    return b''.join(parts)
+
+
+def unpack_save(data):
+    """Return (board, state, history) from save file bytes, in the form pack_save takes them."""
+    if data[:8] != SAVE_MAGIC:
+        raise ValueError("not a Connect 6 save file")
+    (_, size, win_length, current_player, flags, ai_depth, time_budget, type_length, move_count, turn_length,
+     undo_count) = SAVE_HEADER.unpack_from(data, 0)
+    offset = SAVE_HEADER.size
+    ai_type = data[offset:offset + type_length].decode('utf-8')
+    offset += type_length
+    moves = list(SAVE_MOVE.iter_unpack(data[offset:offset + move_count * SAVE_MOVE.size]))
+    offset += move_count * SAVE_MOVE.size
+    undo = list(SAVE_UNDO.iter_unpack(data[offset:offset + undo_count * SAVE_UNDO.size]))
+    offset += undo_count * SAVE_UNDO.size
+
+    board = Board(size, win_length)
+    for count, (r, c, player) in enumerate(moves, 1):
+        if not board.make_move(r, c, player):
+            raise ValueError(f"invalid move {count} at {(r, c)}")
+
+    def turn_state(player, flags, moves_made, turn_length):
+        return {
+            'current_player': player,
+            'player1_first_move': bool(flags & SAVE_FIRST_MOVE),
+            'current_turn_moves': list(board.move_stack[moves_made - turn_length:moves_made]),
+            'game_over': bool(flags & SAVE_GAME_OVER),
+        }
+
+    state = turn_state(current_player, flags, move_count, turn_length)
+    state.update(ai_type=ai_type, ai_depth=ai_depth, ai_time_budget=None if math.isnan(time_budget) else time_budget,
+                 ai_ponder=bool(flags & SAVE_PONDER))
+    history = []
+    for moves_made, player, entry_flags, entry_turn_length in undo:
+        entry = turn_state(player, entry_flags, moves_made, entry_turn_length)
+        entry['moves'] = moves_made
+        history.append(entry)
+    return board, state, history
+
+
+def load_legacy_save(f):
+    """
+    Return (board, state, history) from a pickled save of earlier versions, in the form
+    unpack_save returns them. Such a save holds the grid but not the order the stones
+    were played in, so the board is rebuilt row by row and the undo history is dropped.
+    """
+    game_state = pickle.load(f)
+    board = Board.from_grid(game_state['board'])
+    state = {key: game_state[key] for key in ('current_player', 'ai_type', 'ai_depth', 'player1_first_move',
+                                              'current_turn_moves', 'game_over')}
+    state.update(ai_time_budget=None, ai_ponder=False)
+    return board, state, []
+
+
 # --- Game Manager Class ---
 
 class GameManager:
@@ -1027,21 +441,33 @@ class GameManager:
         self.current_player = PLAYER_1
         self.ai_type = None
         self.ai_depth = None
+        self.ai_time_budget = None
+        self.ai_ponder = False
         self.game_over = False
         self.player1_first_move = True
         self.current_turn_moves = []
         self.state_history = []
+        self.ai_worker = None
+        self.ai_search_id = None
 
     def set_gui(self, gui):
         """Set the GUI for the game manager."""
         self.gui = gui
 
-    def start_new_game(self, ai_type, ai_depth):
-        """Start a new game with the specified AI type and depth."""
-        self.board = Board(BOARD_SIZE)
+    def start_new_game(self, ai_type, ai_depth, ai_time_budget=None, ai_ponder=False, board_size=BOARD_SIZE,
+                       win_length=WIN_SEQUENCE):
+        """
+        Start a new game with the specified AI type, depth and optional time budget per move,
+        on a board_size board won by win_length stones in a row.
+        With ai_ponder the AI searches the human's likely reply while they think.
+        """
+        self.cancel_ai_move()
+        self.board = Board(board_size, win_length)
         self.current_player = PLAYER_1
         self.ai_type = ai_type
         self.ai_depth = ai_depth
+        self.ai_time_budget = ai_time_budget
+        self.ai_ponder = ai_ponder
         self.game_over = False
         self.player1_first_move = True
         self.current_turn_moves = []
@@ -1052,9 +478,9 @@ class GameManager:
         self.gui.display_timer(0.0)
 
     def save_state(self):
-        """Save the current game state for potential undo."""
+        """Save the current game state for potential undo, as the number of moves made so far."""
         state = {
-            'board': self.board.copy(),
+            'moves': len(self.board.move_stack),
             'current_player': self.current_player,
             'player1_first_move': self.player1_first_move,
             'current_turn_moves': self.current_turn_moves.copy(),
@@ -1072,7 +498,8 @@ class GameManager:
             tk.messagebox.showinfo("Cannot Undo", "No moves to undo or not your turn.")
             return
         state = self.state_history.pop()
-        self.board = state['board']
+        while len(self.board.move_stack) > state['moves']:
+            self.board.unmake_move()
         self.current_player = state['current_player']
         self.player1_first_move = state['player1_first_move']
         self.current_turn_moves = state['current_turn_moves']
@@ -1087,18 +514,18 @@ class GameManager:
             tk.messagebox.showinfo("Cannot Save", "Cannot save a finished game.")
             return
         game_state = {
-            'board': self.board.board,
             'current_player': self.current_player,
             'ai_type': self.ai_type,
             'ai_depth': self.ai_depth,
+            'ai_time_budget': self.ai_time_budget,
+            'ai_ponder': self.ai_ponder,
             'player1_first_move': self.player1_first_move,
             'current_turn_moves': self.current_turn_moves,
-            'state_history': self.state_history,
             'game_over': self.game_over
         }
         try:
             with open(SAVE_FILE, 'wb') as f:
-                pickle.dump(game_state, f)
+                f.write(pack_save(self.board, game_state, self.state_history))
             tk.messagebox.showinfo("Save Game", "Game saved successfully.")
             print("Game saved successfully.")
         except Exception as e:
@@ -1107,21 +534,28 @@ class GameManager:
 
     def load_game(self):
         """Load a game state from a file."""
-        if not os.path.exists(SAVE_FILE):
+        legacy = not os.path.exists(SAVE_FILE) and os.path.exists(LEGACY_SAVE_FILE)
+        if not os.path.exists(SAVE_FILE) and not legacy:
             tk.messagebox.showinfo("Load Game", "No saved game found.")
             print("No saved game found.")
             return
         try:
-            with open(SAVE_FILE, 'rb') as f:
-                game_state = pickle.load(f)
-            self.board = Board(BOARD_SIZE)
-            self.board.board = game_state['board']
+            if legacy:
+                with open(LEGACY_SAVE_FILE, 'rb') as f:
+                    board, game_state, state_history = load_legacy_save(f)
+            else:
+                with open(SAVE_FILE, 'rb') as f:
+                    board, game_state, state_history = unpack_save(f.read())
+            self.cancel_ai_move()
+            self.board = board
             self.current_player = game_state['current_player']
             self.ai_type = game_state['ai_type']
             self.ai_depth = game_state['ai_depth']
+            self.ai_time_budget = game_state['ai_time_budget']
+            self.ai_ponder = game_state['ai_ponder']
             self.player1_first_move = game_state['player1_first_move']
             self.current_turn_moves = game_state['current_turn_moves']
-            self.state_history = game_state['state_history']
+            self.state_history = state_history
             self.game_over = game_state['game_over']
             self.gui.menu_frame.pack_forget()
             self.gui.game_frame.pack(expand=True, fill='both')
@@ -1186,12 +620,54 @@ class GameManager:
             print("Invalid move.")
 
     def trigger_ai_move(self):
-        """Trigger the AI to make its move."""
+        """Start the AI's search in the background worker and poll for its move."""
         if self.game_over or self.current_player != PLAYER_2:
             return
         self.gui.disable_input()
         self.gui.update_display(self.board.board, f"Player {self.current_player} (AI) is thinking...")
-        ai_move_pair, time_taken = select_ai_move(self.board, self.ai_type, self.ai_depth)
+        if self.ai_worker is None:
+            self.ai_worker = AIWorker()
+        self.ai_search_id = self.ai_worker.start_search(self.board, self.ai_type, self.ai_depth, self.ai_time_budget)
+        self.gui.show_move_now(True)
+        self.gui.root.after(AI_POLL_INTERVAL, self.poll_ai_move, self.ai_search_id)
+
+    def poll_ai_move(self, search_id):
+        """Show the AI's progress, and play its move once the search is done."""
+        if search_id != self.ai_search_id:
+            return  # the search was cancelled
+        for message in self.ai_worker.poll():
+            if message[0] == 'progress':
+                _, _, depth, nodes, best_pair = message
+                self.gui.display_progress(depth, nodes, best_pair)
+            else:
+                _, _, ai_move_pair, time_taken = message
+                self.ai_search_id = None
+                self.gui.show_move_now(False)
+                self.play_ai_move(ai_move_pair, time_taken)
+                return
+        self.gui.root.after(AI_POLL_INTERVAL, self.poll_ai_move, search_id)
+
+    def move_now(self):
+        """Make the AI play the best move it has found so far."""
+        if self.ai_search_id is not None:
+            self.ai_worker.move_now()
+            self.gui.move_now_button.config(state='disabled')
+
+    def close(self):
+        """Stop the AI worker process, if one was started."""
+        if self.ai_worker is not None:
+            self.ai_worker.close()
+
+    def cancel_ai_move(self):
+        """Abandon any AI search or pondering in progress."""
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+        if self.ai_search_id is not None:
+            self.ai_search_id = None
+            self.gui.show_move_now(False)
+
+    def play_ai_move(self, ai_move_pair, time_taken):
+        """Play the AI's chosen move pair on the board."""
         self.gui.display_timer(time_taken)
         if ai_move_pair is None:
             print("AI could not find a move.")
@@ -1225,6 +701,8 @@ class GameManager:
         self.switch_player()
         self.gui.enable_input()
         self.gui.update_display(self.board.board, f"Player {self.current_player}'s turn (place 2 stones).")
+        if self.ai_ponder:
+            self.ai_worker.start_ponder(self.board, self.ai_type, self.ai_depth, self.ai_time_budget)
 
     def switch_player(self):
         """Switch the current player."""
@@ -1248,7 +726,10 @@ def main():
     gui = GameGUI(root, game_manager)
     game_manager.set_gui(gui)
     gui.show_main_menu()
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        game_manager.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,252 @@
+"""
+Text protocol front end for the Connect 6 engine, in the style of the Gomocup protocol.
+
+Reads one command per line on stdin and answers on stdout, so a match manager can keep
+many long-running engine processes. Only Connect6_engine is imported, never the GUI. A
+game's board and transposition table live for the whole game, so every search starts
+from what the previous ones stored.
+
+Coordinates are "x,y" with x the column and y the row, both from 0. Commands:
+
+    START size [win_length]   new game on a size x size board; answers OK
+    RESTART                   new game on the same board; answers OK
+    INFO key value            settings, no answer: timeout_turn (milliseconds per move,
+                              0 for a fixed-depth search), max_depth, and ai_type (a
+                              name from AI_CONFIGS); other keys are ignored
+    BEGIN                     the engine opens the game with one stone; answers "x,y"
+    TURN x,y [x,y]            the opponent's stones; answers the engine's two stones
+                              as "x,y x,y"
+    BOARD                     then one "x,y,who" line per stone (who 1 for the engine,
+                              2 for the opponent) and DONE; the engine moves as for TURN
+    ABOUT                     answers the engine's name and version
+    END                       exits
+
+A search is preceded by "MESSAGE depth D nodes N time T". Invalid input is answered
+with "ERROR" and a reason.
+
+    python Connect6_protocol.py --ai-type "Single-Stone Search" --depth 4
+"""
+import argparse
+import logging
+import sys
+
+from Connect6_engine import (AI_CONFIGS, AI_HEURISTIC_REDUCTION, DEFAULT_AI_DEPTH, PLAYER_1, PLAYER_2, WIN_SEQUENCE,
+                             Board, TranspositionTable, select_ai_move)
+
+ENGINE_NAME = "Connect6"
+ENGINE_VERSION = "1.0"
+
+
+class ProtocolError(Exception):
+    """A command that cannot be carried out; its message is sent back after ERROR."""
+
+
+def parse_cell(text, board):
+    """Return the (row, col) of an "x,y" coordinate that is empty on board."""
+    try:
+        x, y = (int(value) for value in text.split(","))
+    except ValueError:
+        raise ProtocolError(f"bad coordinate {text!r}")
+    if not board.is_valid_move(y, x):
+        raise ProtocolError(f"{text} is off the board or taken")
+    return y, x
+
+
+def format_cell(cell):
+    """Return (row, col) as an "x,y" coordinate."""
+    row, col = cell
+    return f"{col},{row}"
+
+
+class ProtocolEngine:
+    """
+    State of one protocol session: the board, the engine's colour, the search settings
+    and the transposition table kept from move to move.
+    """
+
+    def __init__(self, ai_type=AI_HEURISTIC_REDUCTION, max_depth=DEFAULT_AI_DEPTH, time_budget=None):
+        self.ai_type = ai_type
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.tt = TranspositionTable()
+        self.board = None
+        self.player = None  # the engine's colour, known once it has moved or been told a move
+        self.board_lines = None  # "x,y,who" lines of a BOARD command until DONE
+
+    def new_game(self, size, win_length):
+        """Start a new game on an empty board. The table is cleared, as nothing in it applies."""
+        self.board = Board(size, win_length)
+        # The search works on copies of this board, which then start with the tracker in place
+        self.board.attach_evaluator(AI_CONFIGS[self.ai_type]["heuristic"])
+        self.player = None
+        self.tt.clear()
+
+    def handle(self, line):
+        """Carry out one input line and return the lines to answer, possibly none."""
+        if self.board_lines is not None:
+            if line.strip().upper() == "DONE":
+                lines, self.board_lines = self.board_lines, None
+                return self.set_position(lines)
+            self.board_lines.append(line)
+            return []
+        words = line.split()
+        if not words:
+            return []
+        command, args = words[0].upper(), words[1:]
+        if command == "END":
+            raise EOFError
+        if command == "ABOUT":
+            return [f'name="{ENGINE_NAME}", version="{ENGINE_VERSION}", game="Connect 6"']
+        if command == "INFO":
+            self.set_info(args)
+            return []
+        if command == "START":
+            if not 1 <= len(args) <= 2 or not all(arg.isdigit() for arg in args):
+                raise ProtocolError("usage: START size [win_length]")
+            size = int(args[0])
+            win_length = int(args[1]) if len(args) > 1 else WIN_SEQUENCE
+            if not 2 <= win_length <= size:
+                raise ProtocolError(f"unsupported board {size} / win length {win_length}")
+            self.new_game(size, win_length)
+            return ["OK"]
+        if self.board is None:
+            raise ProtocolError("no game; send START first")
+        if command == "RESTART":
+            self.new_game(self.board.size, self.board.win_length)
+            return ["OK"]
+        if command == "BEGIN":
+            if self.board.move_stack:
+                raise ProtocolError("BEGIN is only valid on an empty board")
+            self.player = PLAYER_1
+            center = self.board.size // 2
+            self.board.make_move(center, center, PLAYER_1)
+            return [format_cell((center, center))]
+        if command == "TURN":
+            return self.play_turn(args)
+        if command == "BOARD":
+            self.board_lines = []
+            return []
+        raise ProtocolError(f"unknown command {words[0]}")
+
+    def set_info(self, args):
+        """Apply an INFO setting."""
+        if len(args) < 2:
+            return
+        key, value = args[0].lower(), " ".join(args[1:])
+        try:
+            if key == "timeout_turn":
+                milliseconds = int(value)
+                self.time_budget = milliseconds / 1000 if milliseconds > 0 else None
+            elif key == "max_depth":
+                self.max_depth = max(1, int(value))
+            elif key == "ai_type":
+                if value not in AI_CONFIGS:
+                    raise ProtocolError(f"unknown ai_type {value!r}")
+                self.ai_type = value
+                self.tt.clear()  # scores of another heuristic
+                if self.board is not None:
+                    self.board.attach_evaluator(AI_CONFIGS[value]["heuristic"])
+        except ValueError:
+            raise ProtocolError(f"bad value {value!r} for {key}")
+
+    def play_turn(self, args):
+        """Place the opponent's stones given as "x,y" arguments and answer with the engine's move."""
+        board = self.board
+        opponent_first = not board.move_stack
+        if len(args) != (1 if opponent_first else 2):
+            raise ProtocolError(f"TURN takes {1 if opponent_first else 2} stone(s) here")
+        if opponent_first:
+            self.player = PLAYER_2
+        elif self.player is None:
+            raise ProtocolError("the engine's colour is unknown; use BOARD")
+        opponent = PLAYER_1 if self.player == PLAYER_2 else PLAYER_2
+        cells = []
+        for arg in args:
+            cell = parse_cell(arg, board)
+            if cell in cells:
+                raise ProtocolError(f"{arg} given twice")
+            cells.append(cell)
+        for row, col in cells:
+            board.make_move(row, col, opponent)
+        return self.play_move()
+
+    def set_position(self, lines):
+        """Set up the position of a BOARD command and answer with the engine's move."""
+        board = Board(self.board.size, self.board.win_length)
+        counts = {1: 0, 2: 0}
+        for line in lines:
+            coordinate, _, who = line.strip().rpartition(",")
+            if who not in ("1", "2"):
+                raise ProtocolError(f"bad BOARD line {line.strip()!r}")
+            row, col = parse_cell(coordinate, board)
+            counts[int(who)] += 1
+            board.make_move(row, col, int(who))
+        # Player 1 opens with one stone and both then place two, so the side to move always
+        # has one stone fewer than the other side (or the board is empty). Player 1 then
+        # has an odd number of stones and player 2 an even one.
+        if counts[1] == counts[2] == 0:
+            player = PLAYER_1
+        elif counts[2] == counts[1] + 1:
+            player = PLAYER_1 if counts[1] % 2 else PLAYER_2
+        else:
+            raise ProtocolError(f"not a position with the engine to move ({counts[1]} against {counts[2]} stones)")
+        if player != self.player:
+            self.tt.clear()  # scores are from the other side's point of view
+        self.player = player
+        # Stones were placed with who as the colour; recolour them if the engine is player 2
+        self.board = Board(board.size, board.win_length)
+        self.board.attach_evaluator(AI_CONFIGS[self.ai_type]["heuristic"])
+        for row, col in board.move_stack:
+            who = board.board[row][col]
+            self.board.make_move(row, col, self.player if who == 1 else PLAYER_1 + PLAYER_2 - self.player)
+        if not board.move_stack:
+            return self.handle("BEGIN")
+        return self.play_move()
+
+    def play_move(self):
+        """Search the position for the engine, place its stones and return the answer lines."""
+        board = self.board
+        if board.has_six(PLAYER_1) or board.has_six(PLAYER_2):
+            raise ProtocolError("the game is over")
+        if len(board.get_empty_intersections()) < 2:
+            raise ProtocolError("no room for two stones")
+        move_pair, time_taken = select_ai_move(board, self.ai_type, self.max_depth, self.tt, self.time_budget,
+                                               player=self.player)
+        if move_pair is None:
+            raise ProtocolError("no move found")
+        for row, col in move_pair:
+            board.make_move(row, col, self.player)
+        return [f"MESSAGE depth {time_taken.depth} nodes {time_taken.nodes} time {float(time_taken):.3f}",
+                " ".join(format_cell(cell) for cell in move_pair)]
+
+
+def serve(engine, infile, outfile):
+    """Answer the commands read from infile on outfile until END or end of input."""
+    for line in infile:
+        try:
+            answer = engine.handle(line)
+        except EOFError:
+            break
+        except ProtocolError as e:
+            answer = [f"ERROR {e}"]
+        if answer:
+            outfile.write("\n".join(answer) + "\n")
+            outfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Connect 6 engine behind a Gomocup-style text protocol.")
+    parser.add_argument("--ai-type", default=AI_HEURISTIC_REDUCTION, choices=list(AI_CONFIGS))
+    parser.add_argument("--depth", type=int, default=DEFAULT_AI_DEPTH, help="maximum search depth")
+    parser.add_argument("--time", type=float, default=None, help="time budget per move in seconds")
+    parser.add_argument("--log", help="append the engine's decisions to this log file")
+    args = parser.parse_args()
+    if args.log:
+        logging.basicConfig(filename=args.log, level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    engine = ProtocolEngine(args.ai_type, args.depth, args.time)
+    serve(engine, sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
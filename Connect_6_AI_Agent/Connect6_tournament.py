@@ -0,0 +1,226 @@
+"""
+Headless tournament between two Connect 6 AI configs.
+
+Plays --games games between config A and config B in parallel worker processes,
+swapping colours every game, and reports each side's win rate, per-move latency
+percentiles, nodes per second and the peak memory of the worker processes. Player 1
+opens with a single stone near the center, placed from the game's seed.
+
+Every game seeds `random` with --seed plus its index before the first move, so the
+random second stones of a block and the openings are the same on every run, however
+the games are spread across workers.
+
+A config plays opening book moves only from a book it built itself (see
+Connect6_book_builder.py); --no-book makes both sides search every move.
+
+With --stats every search also fills a SearchStats. Each move's stats are kept in the
+JSON report, and the report adds up each side's stats and prints where its time went.
+
+    python Connect6_tournament.py --a heuristic_reduction --b alpha_beta --games 20
+    python Connect6_tournament.py --games 20 --json report.json --csv report.csv
+    python Connect6_tournament.py --size 15 --win-length 5 --games 20
+    python Connect6_tournament.py --games 4 --stats --json report.json
+    python Connect6_tournament.py --games 20 --no-book
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Connect6_engine import (AI_CONFIGS, AI_HEURISTIC_REDUCTION, AI_MINIMAX_ALPHA_BETA, BOARD_SIZE, DEFAULT_AI_DEPTH,
+                             PLAYER_1, PLAYER_2, WIN_SEQUENCE, Board, SearchStats, TranspositionTable,
+                             select_ai_move)
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak memory is then not reported
+    resource = None
+
+
+def peak_memory_kb():
+    """Return the peak resident memory of this process in kilobytes, or None if unknown."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of values by the nearest-rank method, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def play_game(game):
+    """
+    Play one game described by the dict game and return its result dict.
+
+    game holds the game's index and seed, the board size and win length, the opening
+    spread, the turn limit, whether to collect search stats and to use the opening
+    book and, for each side "a" and
+    "b", its ai_type, depth and time_budget, plus "first", the side playing PLAYER_1.
+    """
+    random.seed(game["seed"])
+    board = Board(game["size"], game["win_length"])
+    sides = {PLAYER_1: game["first"], PLAYER_2: "b" if game["first"] == "a" else "a"}
+    tables = {PLAYER_1: TranspositionTable(), PLAYER_2: TranspositionTable()}
+    moves = {"a": [], "b": []}
+
+    center = game["size"] // 2
+    spread = game["spread"]
+    board.make_move(center + random.randint(-spread, spread), center + random.randint(-spread, spread), PLAYER_1)
+    player = PLAYER_2
+    winner = None
+    turns = 1
+    while turns < game["max_turns"] and len(board.get_empty_intersections()) >= 2:
+        side = sides[player]
+        settings = game[side]
+        stats = SearchStats() if game["stats"] else None
+        move_pair, time_taken = select_ai_move(board, settings["ai_type"], settings["depth"], tables[player],
+                                              settings["time_budget"], player=player, stats=stats,
+                                              use_book=game["book"])
+        move = {"seconds": float(time_taken), "nodes": time_taken.nodes, "depth": time_taken.depth}
+        if stats is not None:
+            move["stats"] = stats.to_dict()
+        moves[side].append(move)
+        turns += 1
+        if move_pair is None or any(not board.make_move(row, col, player) for row, col in move_pair):
+            winner = sides[PLAYER_2 if player == PLAYER_1 else PLAYER_1]  # an illegal or missing move forfeits
+            break
+        if board.has_six(player):
+            winner = side
+            break
+        player = PLAYER_2 if player == PLAYER_1 else PLAYER_1
+    return {"index": game["index"], "seed": game["seed"], "first": game["first"], "winner": winner, "turns": turns,
+            "moves": moves, "peak_memory_kb": peak_memory_kb()}
+
+
+def summarize(results, side):
+    """Return the report entry for side ("a" or "b") over all game results."""
+    moves = [move for result in results for move in result["moves"][side]]
+    latencies = [move["seconds"] for move in moves]
+    total_seconds = sum(latencies)
+    wins = sum(1 for result in results if result["winner"] == side)
+    summary = {
+        "wins": wins,
+        "win_rate": wins / len(results) if results else 0.0,
+        "moves": len(moves),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies, default=None),
+        "nodes": sum(move["nodes"] for move in moves),
+        "nodes_per_sec": sum(move["nodes"] for move in moves) / total_seconds if total_seconds else 0.0,
+    }
+    if any("stats" in move for move in moves):
+        stats = SearchStats()
+        for move in moves:
+            stats.merge(move["stats"])
+        summary["search_stats"] = stats.to_dict()
+    return summary
+
+
+def run_tournament(a, b, games, seed, workers, size=BOARD_SIZE, spread=2, max_turns=200, win_length=WIN_SEQUENCE,
+                   stats=False, book=True):
+    """
+    Play games between the side settings a and b (dicts of ai_type, depth, time_budget)
+    across workers processes and return the report dict. With stats, every move also
+    collects SearchStats. Without book, no move is played from the opening book.
+    """
+    specs = [{"index": i, "seed": seed + i, "size": size, "win_length": win_length, "spread": spread,
+              "max_turns": max_turns, "stats": stats, "book": book, "first": "a" if i % 2 == 0 else "b",
+              "a": a, "b": b}
+             for i in range(games)]
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play_game, specs))
+    else:
+        results = [play_game(spec) for spec in specs]
+    seconds = time.perf_counter() - start
+    memory = [result["peak_memory_kb"] for result in results if result["peak_memory_kb"] is not None]
+    return {
+        "a": a,
+        "b": b,
+        "games": games,
+        "size": size,
+        "win_length": win_length,
+        "seed": seed,
+        "book": book,
+        "workers": workers,
+        "seconds": seconds,
+        "draws": sum(1 for result in results if result["winner"] is None),
+        "peak_memory_kb": max(memory, default=None),
+        "summary": {"a": summarize(results, "a"), "b": summarize(results, "b")},
+        "results": results,
+    }
+
+
+def write_csv(path, report):
+    """Write one row of summary statistics per side to path. Search stats are left to the JSON report."""
+    fields = ["side", "ai_type", "depth", "time_budget", "wins", "win_rate", "moves", "latency_p50", "latency_p90",
+              "latency_p99", "latency_max", "nodes", "nodes_per_sec"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields + ["draws", "games", "peak_memory_kb"], extrasaction="ignore")
+        writer.writeheader()
+        for side in ("a", "b"):
+            row = {"side": side, **report[side], **report["summary"][side], "draws": report["draws"],
+                   "games": report["games"], "peak_memory_kb": report["peak_memory_kb"]}
+            writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Connect 6 AI configs against each other without the GUI.")
+    parser.add_argument("--a", default=AI_HEURISTIC_REDUCTION, choices=list(AI_CONFIGS), help="AI type of side A")
+    parser.add_argument("--a-depth", type=int, default=DEFAULT_AI_DEPTH)
+    parser.add_argument("--a-time", type=float, default=None, help="time budget per move of side A, in seconds")
+    parser.add_argument("--b", default=AI_MINIMAX_ALPHA_BETA, choices=list(AI_CONFIGS), help="AI type of side B")
+    parser.add_argument("--b-depth", type=int, default=DEFAULT_AI_DEPTH)
+    parser.add_argument("--b-time", type=float, default=None, help="time budget per move of side B, in seconds")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="game worker processes")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="board size")
+    parser.add_argument("--win-length", type=int, default=WIN_SEQUENCE, help="stones in a row that win")
+    parser.add_argument("--spread", type=int, default=2, help="maximum distance of the first stone from the center")
+    parser.add_argument("--max-turns", type=int, default=200, help="turns after which a game is a draw")
+    parser.add_argument("--json", help="write the full report, with every game, to this JSON file")
+    parser.add_argument("--csv", help="write the per-side summary to this CSV file")
+    parser.add_argument("--stats", action="store_true", help="collect search stats for every move")
+    parser.add_argument("--no-book", action="store_true", help="search every move instead of playing book moves")
+    args = parser.parse_args()
+
+    a = {"ai_type": args.a, "depth": args.a_depth, "time_budget": args.a_time}
+    b = {"ai_type": args.b, "depth": args.b_depth, "time_budget": args.b_time}
+    report = run_tournament(a, b, args.games, args.seed, args.workers, args.size, args.spread, args.max_turns,
+                           args.win_length, args.stats, not args.no_book)
+
+    print(f"{args.games} games of {args.win_length} in a row on {args.size}x{args.size} in {report['seconds']:.1f}s"
+          f" on {args.workers} workers, {report['draws']} draws,"
+          f" peak memory {report['peak_memory_kb']} KB")
+    for side in ("a", "b"):
+        stats = report["summary"][side]
+        settings = report[side]
+        print(f"{side.upper()} {settings['ai_type']} depth {settings['depth']}: {stats['wins']} wins"
+              f" ({stats['win_rate']:.0%}), latency p50 {stats['latency_p50'] or 0:.3f}s"
+              f" p90 {stats['latency_p90'] or 0:.3f}s p99 {stats['latency_p99'] or 0:.3f}s,"
+              f" {stats['nodes_per_sec']:.0f} nodes/sec")
+        if "search_stats" in stats:
+            search = stats["search_stats"]
+            seconds = ", ".join(f"{kind} {value:.2f}s" for kind, value in search["seconds"].items())
+            print(f"  branching factor {search['branching_factor']}, first-move cutoffs"
+                  f" {search['first_move_cutoff_rate']}, {search['leaf_evaluations']} leaf evaluations; {seconds}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, report)
+
+
+if __name__ == "__main__":
+    main()